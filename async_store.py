@@ -0,0 +1,64 @@
+import queue
+import threading
+
+# =========================
+# Background store executor
+# =========================
+# One thread owns the store and runs its methods in the order they were
+# requested, so screens never wait on disk I/O. Each result is passed to
+# deliver(callback, result); the app points deliver at Clock.schedule_once so
+# callbacks run on the Kivy main thread. The store is opened on the worker
+# thread too, because SQLite connections only work on the thread that made
+# them. A failed call hands the exception to on_error, or re-raises it on the
+# delivering side when there is none.
+class AsyncStore:
+    def __init__(self, opener, deliver):
+        self.deliver = deliver
+        self.requests = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, args=(opener,), name='store', daemon=True)
+        self.thread.start()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def _run(self, opener):
+        try:
+            store, open_error = opener(), None
+        except Exception as e:
+            store, open_error = None, e
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            method, args, kwargs, callback, on_error = request
+            try:
+                if open_error is not None:
+                    raise open_error
+                result = getattr(store, method)(*args, **kwargs)
+            except Exception as e:
+                self.deliver(on_error or _reraise, e)
+            else:
+                if callback is not None:
+                    self.deliver(callback, result)
+            finally:
+                with self._pending_lock:
+                    self._pending -= 1
+
+    def call(self, method, *args, callback=None, on_error=None, **kwargs):
+        with self._pending_lock:
+            self._pending += 1
+        self.requests.put((method, args, kwargs, callback, on_error))
+
+    # Runs the store's own close() after everything already queued, then
+    # stops the thread.
+    def close(self):
+        self.call('close')
+        self.requests.put(None)
+        self.thread.join()
+
+
+def _reraise(error):
+    raise error
@@ -0,0 +1,51 @@
+import numpy as np
+
+import scoring
+
+# =========================
+# Vectorized batch scoring
+# =========================
+# Same formula as scoring.score(), over an (N x categories) array of option
+# indices (-1 = unselected). Rows of POINTS_TABLE are padded with zeros, so the
+# last column is the unselected slot for every category.
+RISK_BOUNDS = np.array([bound for bound, _ in scoring.RISK_THRESHOLDS], dtype=np.float64)
+
+OPTION_COUNTS = np.array([len(row) - 1 for row in scoring.POINTS], dtype=np.intp)
+POINTS_TABLE = np.zeros((len(scoring.POINTS), OPTION_COUNTS.max() + 1), dtype=np.int64)
+for _row, _points in enumerate(scoring.POINTS):
+    POINTS_TABLE[_row, :len(_points) - 1] = _points[:-1]
+
+INTERACTION_TABLES = tuple(
+    (coefficient, ia, ib, np.array(products, dtype=np.int64))
+    for coefficient, ia, ib, products in scoring.COMPILED_INTERACTIONS
+)
+
+
+def _round_like_python(totals):
+    # np.round scales by 100 and can land on the other side of a tie from the
+    # builtin round(); totals take few distinct values, so round those exactly.
+    unique, inverse = np.unique(totals, return_inverse=True)
+    rounded = np.array([round(value, 2) for value in unique.tolist()], dtype=np.float64)
+    return rounded[inverse.reshape(totals.shape)]
+
+
+# Returns (totals, risk level codes); codes index scoring.RISK_LEVEL_NAMES.
+def score_batch(indices):
+    indices = np.asarray(indices, dtype=np.intp)
+    if indices.ndim != 2 or indices.shape[1] != len(scoring.CATEGORY_NAMES):
+        raise ValueError(f'expected an (N x {len(scoring.CATEGORY_NAMES)}) array of option indices, got shape {indices.shape}')
+    if ((indices < -1) | (indices >= OPTION_COUNTS)).any():
+        raise ValueError('option index out of range')
+
+    columns = np.where(indices < 0, POINTS_TABLE.shape[1] - 1, indices)
+    totals = POINTS_TABLE[np.arange(len(scoring.POINTS)), columns].sum(axis=1).astype(np.float64)
+    for coefficient, ia, ib, products in INTERACTION_TABLES:
+        totals = totals + coefficient * products[indices[:, ia], indices[:, ib]]
+    if totals.size:
+        totals = _round_like_python(totals)
+    levels = np.searchsorted(RISK_BOUNDS, totals, side='left').astype(np.int8)
+    return totals, levels
+
+
+def level_names(levels):
+    return [scoring.RISK_LEVEL_NAMES[code] for code in levels.tolist()]
@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_store import AsyncStore
+from profiling import FrameStats
+from reports import Report
+from storage import JsonUserStore
+import scoring
+
+# Replays a session of screen actions (login lookup, saving a result, opening
+# the reports page, changing the email, clearing reports) against a large
+# JSON store inside a simulated 60 Hz main loop, once calling the store inline
+# as the screens used to and once through AsyncStore with callbacks delivered
+# on the loop, like Clock.schedule_once. Prints FrameStats for both runs.
+# --latency adds a sleep to every store call to mimic slow storage. While the
+# store thread runs Python code the UI thread can wait up to one GIL switch
+# interval (5 ms by default) for its turn; --switch-interval changes it.
+FRAME = 1 / 60
+SESSION = [
+    ('get_user', ('user5',), {}),
+    ('append_report', ('user5', None), {}),
+    ('count_reports', ('user5',), {}),
+    ('get_reports', ('user5', 0, 50), {}),
+    ('update_user', ('user5',), {'email': 'someone@example.com'}),
+    ('append_report', ('user5', None), {}),
+    ('get_reports', ('user5', 0, 50), {}),
+    ('clear_reports', ('user5',), {}),
+]
+
+
+class SlowStore(JsonUserStore):
+    latency = 0.0
+
+    def __getattribute__(self, name):
+        attr = super().__getattribute__(name)
+        if name in ('get_user', 'append_report', 'get_reports', 'count_reports', 'update_user', 'clear_reports'):
+            latency = super().__getattribute__('latency')
+
+            def slow(*args, **kwargs):
+                time.sleep(latency)
+                return attr(*args, **kwargs)
+            return slow
+        return attr
+
+
+def build_store(path, users, reports, seed):
+    rng = random.Random(seed)
+
+    def report():
+        indices = [rng.randrange(-1, len(labels)) for labels in scoring.CATEGORY_LABELS.values()]
+        return Report.create(indices, *scoring.score(indices), scoring.SCHEMA_VERSION, timestamp=0).encode()
+    data = {f'user{i}': {'password': 'x', 'reports': [report() for _ in range(reports)]} for i in range(users)}
+    JsonUserStore(path).save_users(data)
+
+
+def session_requests():
+    report = Report.create([0] * len(scoring.CATEGORY_NAMES), *scoring.score([0] * len(scoring.CATEGORY_NAMES)),
+                           scoring.SCHEMA_VERSION).encode()
+    for method, args, kwargs in SESSION:
+        yield method, tuple(report if a is None else a for a in args), kwargs
+
+
+def run(mode, source, latency, gap_frames):
+    with tempfile.TemporaryDirectory() as directory:
+        return run_in(directory, mode, source, latency, gap_frames)
+
+
+def run_in(directory, mode, source, latency, gap_frames):
+    path = os.path.join(directory, 'users.json')
+    # copy2 keeps the mtime the index was written against
+    for suffix in ('', '.index'):
+        shutil.copy2(source + suffix, path + suffix)
+
+    def opener():
+        store = SlowStore(path)
+        store.latency = latency
+        return store
+
+    stats = FrameStats()
+    callbacks = queue.Queue()
+    if mode == 'async':
+        store = AsyncStore(opener, lambda callback, result: callbacks.put((callback, result)))
+        busy = lambda: store.pending > 0
+    else:
+        sync_store = opener()
+        busy = lambda: False
+
+    requests = list(session_requests())
+    done = []
+    frame = 0
+    last = time.perf_counter()
+    while len(done) < len(requests) or (mode == 'async' and store.pending):
+        # what Clock does each frame: run delivered callbacks, then handlers
+        while not callbacks.empty():
+            callback, result = callbacks.get()
+            callback(result)
+        if frame % gap_frames == 0 and frame // gap_frames < len(requests):
+            method, args, kwargs = requests[frame // gap_frames]
+            if mode == 'async':
+                store.call(method, *args, callback=done.append, **kwargs)
+            else:
+                done.append(getattr(sync_store, method)(*args, **kwargs))
+        # sleep to the next vsync, as the window would
+        now = time.perf_counter()
+        time.sleep(max(0.0, FRAME - (now - last)))
+        now = time.perf_counter()
+        stats.record((now - last) * 1000, mode == 'sync' or busy())
+        last = now
+        frame += 1
+
+    if mode == 'async':
+        store.close()
+    else:
+        sync_store.close()
+    return stats.summary()['busy']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Frame times with inline vs background store calls.')
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--reports', type=int, default=10, help='reports per user')
+    parser.add_argument('--latency', type=float, default=0.0, help='extra seconds per store call')
+    parser.add_argument('--gap', type=int, default=20, help='frames between actions')
+    parser.add_argument('--switch-interval', type=float, help='sys.setswitchinterval() for the run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.switch_interval:
+        sys.setswitchinterval(args.switch_interval)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'users.json')
+        build_store(source, args.users, args.reports, args.seed)
+        print(f'users={args.users} reports/user={args.reports} '
+              f'users.json={os.path.getsize(source) / 1e6:.1f} MB latency={args.latency * 1000:.0f} ms '
+              f'switch interval={sys.getswitchinterval() * 1000:g} ms')
+        for mode in ('sync', 'async'):
+            summary = run(mode, source, args.latency, args.gap)
+            print(f'  {mode:<6} ' + json.dumps(summary))
+
+
+if __name__ == '__main__':
+    main()
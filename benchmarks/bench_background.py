@@ -0,0 +1,109 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+# main.py opens its store as soon as it is imported
+os.environ.setdefault('RISKAPP_STORE_PATH', os.path.join(tempfile.mkdtemp(), 'users.json'))
+
+from kivy.graphics.instructions import Canvas, InstructionGroup, VertexInstruction
+
+# Builds every screen of one of the app entry points (main, main_2, main_3)
+# and counts what the screens put on the GPU: canvas instructions, vertex
+# instructions (one draw call each) for the screen on display, and the size/pos
+# observers bound on the screens themselves. It then replays a slide
+# transition and a run of window resizes by setting pos and size directly, as
+# the transition and layout do each frame, and times them. Run it on two
+# revisions to compare, e.g. before and after a change to the backgrounds.
+SLIDE_FRAMES = 24  # SlideTransition lasts 0.4 s at 60 Hz
+
+
+def canvases(canvas):
+    if canvas.has_before:
+        yield canvas.before
+    yield canvas
+    if canvas.has_after:
+        yield canvas.after
+
+
+def count_instructions(canvas, totals):
+    for group in canvases(canvas):
+        for instruction in group.children:
+            if isinstance(instruction, Canvas):
+                count_instructions(instruction, totals)
+                continue
+            totals['instructions'] += 1
+            if isinstance(instruction, VertexInstruction):
+                totals['draw_calls'] += 1
+            elif isinstance(instruction, InstructionGroup):
+                count_instructions(instruction, totals)
+    return totals
+
+
+def observers(widget):
+    return len(widget.get_property_observers('size')) + len(widget.get_property_observers('pos'))
+
+
+def build(module):
+    root = module.RiskApp().build()
+    # LazyScreenManager builds screens on first use
+    for name in list(getattr(root, 'factories', {})):
+        root.get_screen(name)
+    return root
+
+
+def measure(module_name, frames):
+    module = importlib.import_module(module_name)
+    root = build(module)
+    root.size = (800, 600)
+    root.do_layout()
+    screens = root.screens
+    shown = root.current_screen
+
+    totals = {'instructions': 0, 'draw_calls': 0}
+    for screen in screens:
+        count_instructions(screen.canvas, totals)
+    result = {
+        'module': module_name,
+        'screens': len(screens),
+        'instructions (all screens)': totals['instructions'],
+        'draw calls (screen on display)': count_instructions(shown.canvas, {'instructions': 0, 'draw_calls': 0})['draw_calls'],
+        'size/pos observers on screens': sum(observers(screen) for screen in screens),
+    }
+
+    leaving, entering = shown, next(screen for screen in screens if screen is not shown)
+    start = time.perf_counter()
+    for _ in range(frames):
+        for step in range(SLIDE_FRAMES):
+            offset = root.width * (step + 1) / SLIDE_FRAMES
+            leaving.x = -offset
+            entering.x = root.width - offset
+    result['slide ms'] = round((time.perf_counter() - start) * 1000 / frames, 3)
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        root.size = (800 + frame % 2, 600)
+        for screen in screens:
+            screen.size = root.size
+    result['resize frame us'] = round((time.perf_counter() - start) * 1e6 / frames, 2)
+
+    if hasattr(module, 'store'):
+        module.store.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Canvas instructions and bindings of every screen.')
+    parser.add_argument('--module', default='main', help='main, main_2 or main_3')
+    parser.add_argument('--frames', type=int, default=200, help='slides and resizes to time')
+    args = parser.parse_args()
+    print(json.dumps(measure(args.module, args.frames), indent=2))
+
+
+if __name__ == '__main__':
+    main()
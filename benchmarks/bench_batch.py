@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import scoring
+from batch_scoring import level_names, score_batch
+from sample_forms import labelled, random_forms
+
+# Scores N random questionnaires with score_batch() and with
+# calculate_fake_risk() in a loop, checks they agree exactly and reports both
+# throughputs.
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch vs per-form scoring benchmark.')
+    parser.add_argument('-n', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rows = random_forms(args.n, args.seed)
+    forms = [labelled(row) for row in rows]
+    array = np.array(rows, dtype=np.intp)
+
+    start = time.perf_counter()
+    expected = [scoring.calculate_fake_risk(form) for form in forms]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    totals, levels = score_batch(array)
+    batch_time = time.perf_counter() - start
+
+    got = [scoring.format_score(t, l) for t, l in zip(totals.tolist(), level_names(levels))]
+    mismatches = sum(a != b for a, b in zip(expected, got))
+
+    print(f'n={args.n}')
+    print(f'  calculate_fake_risk loop: {loop_time:.3f}s ({args.n / loop_time:,.0f} forms/s)')
+    print(f'  score_batch:              {batch_time:.3f}s ({args.n / batch_time:,.0f} forms/s)')
+    print(f'  speedup: {loop_time / batch_time:.1f}x  mismatches: {mismatches}')
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scoring
+from parallel_scoring import score_parallel
+from sample_forms import random_forms
+
+# Scales process-pool scoring over 1, 2, 4 and 8 workers on the same random
+# forms and checks every run against the in-process result.
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process-pool scoring scaling benchmark.')
+    parser.add_argument('-n', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rows = random_forms(args.n, args.seed)
+    # the pool workers memoize too, so compare against the uncached path
+    start = time.perf_counter()
+    expected = [scoring.score(row)[1:] for row in rows]
+    serial = time.perf_counter() - start
+
+    print(f'n={args.n} chunk_size={args.chunk_size} cpu_count={os.cpu_count()}')
+    print(f'  in-process score():  {serial:.2f}s ({args.n / serial:,.0f} forms/s)')
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        results = score_parallel(rows, workers, args.chunk_size)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        ok = results == expected
+        print(f'  workers={workers}: {elapsed:.2f}s ({args.n / elapsed:,.0f} forms/s, '
+              f'{baseline / elapsed:.2f}x vs 1 worker){"" if ok else "  MISMATCH"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import hashlib
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import passwords
+
+# Verify latency of each hashing scheme across cost settings, to pick a cost
+# that is slow for an attacker but acceptable on the target device. The last
+# column runs the verification on a worker thread, as the app does, while the
+# main thread ticks at 60 Hz, and shows the longest gap between ticks: it
+# stays near 16.7 ms when hashing does not hold the GIL.
+PASSWORD = 'correct horse battery staple'
+FRAME = 1 / 60
+
+
+def time_verify(stored, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        passwords.verify_password(PASSWORD, stored)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def longest_frame_gap(stored):
+    done = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as worker:
+        worker.submit(passwords.verify_password, PASSWORD, stored).add_done_callback(lambda f: done.set())
+        last = time.perf_counter()
+        longest = 0.0
+        while not done.is_set():
+            time.sleep(FRAME)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+    return longest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Password verify latency across cost settings.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--pbkdf2', default='100000,300000,600000,1200000', help='iteration counts')
+    parser.add_argument('--scrypt', default='14,15,16,17', help='log2 of the scrypt n values')
+    args = parser.parse_args()
+
+    cases = [('legacy sha256', hashlib.sha256(PASSWORD.encode()).hexdigest())]
+    cases += [(f'pbkdf2_sha256 {int(n):,}', passwords.hash_password(PASSWORD, 'pbkdf2_sha256', int(n)))
+              for n in args.pbkdf2.split(',')]
+    if hasattr(hashlib, 'scrypt'):
+        cases += [(f'scrypt n=2^{n}', passwords.hash_password(PASSWORD, 'scrypt', 2 ** int(n)))
+                  for n in args.scrypt.split(',')]
+
+    print(f'default: {passwords.current_scheme} cost={passwords.current_cost}')
+    print(f'{"scheme / cost":<26} {"verify (median)":>16} {"longest frame":>14}')
+    for name, stored in cases:
+        latency = time_verify(stored, args.repeat)
+        gap = longest_frame_gap(stored)
+        print(f'{name:<26} {latency * 1e3:13.2f} ms {gap * 1e3:11.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scoring
+from sample_forms import labelled, random_indices
+
+# Replays submissions drawn from a Zipf-like distribution over a pool of
+# distinct answer sets (a few very common, a long tail of rare ones) through
+# the uncached and the memoized scoring path and reports per-call latency.
+
+
+def submissions(n, distinct, skew, seed):
+    rng = random.Random(seed)
+    pool = [random_indices(rng) for _ in range(distinct)]
+    weights = [1 / (rank + 1) ** skew for rank in range(distinct)]
+    return rng.choices(pool, weights=weights, k=n)
+
+
+def time_per_call(func, forms):
+    start = time.perf_counter()
+    for form in forms:
+        func(form)
+    return (time.perf_counter() - start) / len(forms) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LRU-memoized scoring benchmark.')
+    parser.add_argument('-n', type=int, default=200_000, help='submissions to replay')
+    parser.add_argument('--distinct', type=int, default=20_000, help='distinct answer sets in the pool')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of answer-set popularity')
+    parser.add_argument('--cache-size', type=int, default=scoring.DEFAULT_CACHE_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    forms = submissions(args.n, args.distinct, args.skew, args.seed)
+    labelled_forms = [labelled(form) for form in forms]
+
+    uncached = time_per_call(scoring.score, forms)
+    scoring.configure_cache(args.cache_size)
+    cached = time_per_call(scoring.cached_score, forms)
+    info = scoring.cache_info()
+
+    scoring.configure_cache(0)
+    labels_uncached = time_per_call(scoring.calculate_fake_risk, labelled_forms)
+    scoring.configure_cache(args.cache_size)
+    labels_cached = time_per_call(scoring.calculate_fake_risk, labelled_forms)
+
+    print(f'n={args.n} distinct={args.distinct} skew={args.skew} cache_size={args.cache_size}')
+    print(f'  hit rate: {info.hits / (info.hits + info.misses):.1%} ({info.hits} hits, {info.misses} misses)')
+    print(f'  score():               {uncached:.2f} us/call')
+    print(f'  cached_score():        {cached:.2f} us/call ({uncached / cached:.1f}x)')
+    print(f'  calculate_fake_risk(): {labels_uncached:.2f} us/call uncached, {labels_cached:.2f} us/call cached')
+
+
+if __name__ == '__main__':
+    main()
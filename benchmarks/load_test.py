@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sample_forms import named, random_indices
+from storage import BACKENDS, open_store
+
+# Load test for score_server.py on localhost. Starts the server (unless --port
+# points at one already running), opens --connections keep-alive connections
+# and sends --requests requests over each, then reports latency percentiles
+# and throughput.
+
+
+def random_form(rng):
+    return named(random_indices(rng))
+
+
+async def request(reader, writer, path, payload):
+    body = json.dumps(payload).encode()
+    writer.write(
+        f'POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+    )
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(port, requests, batch, username, seed, latencies, errors):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for _ in range(requests):
+            if batch > 1:
+                path, payload = '/score/batch', {'forms': [random_form(rng) for _ in range(batch)]}
+            else:
+                path, payload = '/score', {'selections': random_form(rng)}
+            if username:
+                payload['username'] = username
+            start = time.perf_counter()
+            status = await request(reader, writer, path, payload)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(port, connections, requests, batch, username):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(port, requests, batch, username, seed, latencies, errors)
+        for seed in range(connections)
+    ))
+    return time.perf_counter() - start, latencies, errors
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError('server did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test for the HTTP scoring service.')
+    parser.add_argument('--port', type=int, help='use a server already running on this port')
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=300, help='requests per connection')
+    parser.add_argument('--batch', type=int, default=1, help='forms per request (>1 uses /score/batch)')
+    parser.add_argument('--store', choices=sorted(BACKENDS),
+                        help='start the server with a fresh store of this kind and save every report')
+    parser.add_argument('--max-concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    username = None
+    tmp = tempfile.TemporaryDirectory()
+    if port is None:
+        port = free_port()
+        command = [sys.executable, os.path.join(ROOT, 'score_server.py'), '--port', str(port),
+                   '--max-concurrency', str(args.max_concurrency)]
+        if args.store:
+            username = 'loadtest'
+            store_path = os.path.join(tmp.name, 'store')
+            store = open_store(args.store, store_path)
+            store.create_user(username, 'unused')
+            store.close()
+            command += ['--store', args.store, '--store-path', store_path]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        elapsed, latencies, errors = asyncio.run(
+            run(port, args.connections, args.requests, args.batch, username)
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        tmp.cleanup()
+
+    latencies.sort()
+    ms = [l * 1000 for l in latencies]
+    total = len(latencies)
+    print(f'connections={args.connections} requests/conn={args.requests} batch={args.batch} store={args.store}')
+    print(f'  requests: {total}  errors: {len(errors)}  wall: {elapsed:.2f}s')
+    print(f'  throughput: {total / elapsed:,.0f} req/s ({total * args.batch / elapsed:,.0f} forms/s)')
+    print(f'  latency p50: {statistics.median(ms):.2f} ms  p99: {ms[int(total * 0.99) - 1]:.2f} ms  max: {ms[-1]:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import BACKENDS, open_store
+
+# Several processes hammer one store at the same time: each creates its own
+# accounts and appends reports to them and to one shared account. Afterwards
+# every account and every report must be present.
+
+SHARED_USER = 'shared'
+
+
+def worker(backend, path, worker_id, accounts, reports, start_event, results):
+    store = open_store(backend, path)
+    start_event.wait()
+    started = time.perf_counter()
+    ops = 0
+    for a in range(accounts):
+        username = f'w{worker_id}-u{a}'
+        assert store.create_user(username, 'hash')
+        ops += 1
+        for r in range(reports):
+            assert store.append_report(username, f'{username}-r{r}')
+            assert store.append_report(SHARED_USER, f'{username}-r{r}')
+            ops += 2
+    elapsed = time.perf_counter() - started
+    store.close()
+    results.put((worker_id, ops, elapsed, getattr(store, 'stats', {}).get('conflicts', 0)))
+
+
+def run(backend, path, processes, accounts, reports):
+    store = open_store(backend, path)
+    store.create_user(SHARED_USER, 'hash')
+    store.close()
+
+    start_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=worker, args=(backend, path, i, accounts, reports, start_event, results))
+        for i in range(processes)
+    ]
+    for p in procs:
+        p.start()
+    wall_start = time.perf_counter()
+    start_event.set()
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    wall = time.perf_counter() - wall_start
+
+    store = open_store(backend, path)
+    users = store.load_all()
+    store.close()
+
+    missing = []
+    for worker_id in range(processes):
+        for a in range(accounts):
+            username = f'w{worker_id}-u{a}'
+            expected = [f'{username}-r{r}' for r in range(reports)]
+            if users.get(username, {}).get('reports') != expected:
+                missing.append(username)
+    shared = users[SHARED_USER]['reports']
+    expected_shared = processes * accounts * reports
+    total_ops = sum(ops for _, ops, _, _ in stats)
+
+    print(f'backend={backend} processes={processes} accounts/proc={accounts} reports/account={reports}')
+    print(f'  accounts ok: {processes * accounts - len(missing)}/{processes * accounts}')
+    print(f'  shared reports: {len(shared)}/{expected_shared} ({len(set(shared))} unique)')
+    print(f'  conflicts retried: {sum(c for _, _, _, c in stats)}')
+    print(f'  wall: {wall:.2f}s  throughput: {total_ops / wall:.0f} ops/s')
+    return not missing and len(shared) == expected_shared == len(set(shared))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-process lost-update stress test for the user store.')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='json')
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--accounts', type=int, default=20)
+    parser.add_argument('--reports', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, {'json': 'users.json', 'sqlite': 'users.db'}.get(args.backend, 'users'))
+        ok = run(args.backend, path, args.processes, args.accounts, args.reports)
+    print('PASS' if ok else 'FAIL: updates were lost')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+import argparse
+import datetime
+import functools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import passwords
+import scoring
+from reports import Report, format_report
+from sample_forms import labelled, random_indices
+from storage import JsonUserStore
+
+# Headless micro-benchmarks for the scoring and storage hot paths. Every case
+# is timed with timeit (autoranged loop count, best and median of several
+# repeats) and the results are written as JSON, one entry per case:
+#
+#   python benchmarks/suite.py -o bench.json
+#   python benchmarks/suite.py --quick -k login --compare bench.json
+#
+# The store cases run against the default JSON backend in a temporary
+# directory. load_users is timed on a freshly opened store, so it includes
+# parsing the whole file, which is what the first login after launch pays.
+# Login cases include the password check at the current hashing policy.
+PAGE_SIZE = 50  # main.ReportsPage.PAGE_SIZE
+PASSWORD = 'correct horse'
+
+
+# every generated account shares one hash, made under the current policy
+@functools.cache
+def password_hash():
+    return passwords.hash_password(PASSWORD)
+
+
+def random_report(rng):
+    indices = random_indices(rng)
+    points, total, level = scoring.score(indices)
+    return Report.create(indices, points, total, level, scoring.SCHEMA_VERSION,
+                         timestamp=1_700_000_000 + rng.randrange(10_000_000)).encode()
+
+
+def make_users(count, reports, rng):
+    password = password_hash()
+    return {
+        f'user{i}': {'password': password, 'reports': [random_report(rng) for _ in range(reports)]}
+        for i in range(count)
+    }
+
+
+# =========================
+# Harness
+# =========================
+class Suite:
+    def __init__(self, pattern=None, repeat=5):
+        self.pattern = pattern
+        self.repeat = repeat
+        self.results = []
+
+    def wants(self, name):
+        return not self.pattern or self.pattern in name
+
+    # Times func() and records seconds per call (per item when items is given).
+    def run(self, name, func, params=None, items=1, repeat=None):
+        if not self.wants(name):
+            return
+        timer = timeit.Timer(func)
+        loops, _ = timer.autorange()
+        times = [t / loops / items for t in timer.repeat(repeat or self.repeat, loops)]
+        result = {
+            'name': name,
+            'params': params or {},
+            'loops': loops,
+            'repeat': len(times),
+            'best': min(times),
+            'median': statistics.median(times),
+            'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        }
+        self.results.append(result)
+        label = ' '.join(f'{k}={v}' for k, v in result['params'].items())
+        print(f'{name:<32} {label:<40} {format_seconds(result["best"]):>10} best'
+              f'  {format_seconds(result["median"]):>10} median', file=sys.stderr)
+
+
+def format_seconds(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f} {unit}'
+    return f'{seconds / 1e-9:.0f} ns'
+
+
+# =========================
+# Cases
+# =========================
+def bench_scoring(suite, rng):
+    forms = [random_indices(rng) for _ in range(1000)]
+    labelled_forms = [labelled(form) for form in forms]
+    one = labelled_forms[0]
+
+    scoring.configure_cache(0)
+    suite.run('calculate_fake_risk.uncached', lambda: scoring.calculate_fake_risk(one))
+    scoring.configure_cache(scoring.DEFAULT_CACHE_SIZE)
+    suite.run('calculate_fake_risk.cached', lambda: scoring.calculate_fake_risk(one))
+    suite.run('score', lambda: scoring.score(forms[0]))
+
+    def loop():
+        for form in forms:
+            scoring.score(form)
+    suite.run('batch.loop', loop, {'forms': len(forms)}, items=len(forms))
+
+    try:
+        import numpy as np
+        from batch_scoring import score_batch
+    except ImportError:
+        print('numpy not installed; skipping batch.numpy', file=sys.stderr)
+        return
+    for size in (1000, 100_000):
+        array = np.array([random_indices(rng) for _ in range(size)], dtype=np.intp)
+        suite.run('batch.numpy', lambda: score_batch(array), {'forms': size}, items=size)
+
+
+def bench_store(suite, rng, user_counts, report_counts, directory):
+    for count in user_counts:
+        for reports in report_counts:
+            names = [f'store.{case}' for case in ('load_users', 'save_users', 'login.cold', 'login.warm')]
+            if not any(map(suite.wants, names)):
+                continue
+            params = {'users': count, 'reports': reports}
+            path = os.path.join(directory, f'users-{count}-{reports}.json')
+            store = JsonUserStore(path, journal=False)
+            users = make_users(count, reports, rng)
+            store.save_users(users)
+            params['bytes'] = os.path.getsize(path)
+            # one-shot cases over large files take seconds, so repeat them less
+            repeat = 3 if params['bytes'] > 10_000_000 else None
+
+            suite.run('store.load_users', lambda: JsonUserStore(path, journal=False).load_users(),
+                      params, repeat=repeat)
+            suite.run('store.save_users', lambda: store.save_users(users), params, repeat=repeat)
+
+            # same steps as main.check_user_credentials
+            username = f'user{count // 2}'
+
+            def login(store):
+                user = store.get_user(username)
+                return user is not None and passwords.verify_password(PASSWORD, user['password'])[0]
+            suite.run('store.login.cold', lambda: login(JsonUserStore(path, journal=False)),
+                      params, repeat=repeat)
+            suite.run('store.login.warm', lambda: login(store), params)
+
+
+def bench_history(suite, rng, directory):
+    path = os.path.join(directory, 'history.json')
+    store = JsonUserStore(path, journal=False)
+    for reports in (PAGE_SIZE, 1000, 10_000):
+        username = f'history{reports}'
+        store.put_user(username, {'password': password_hash(),
+                                  'reports': [random_report(rng) for _ in range(reports)]})
+        params = {'reports': reports}
+
+        # what ReportsPage.on_pre_enter does: count, then fetch and format a page
+        def first_page():
+            store.count_reports(username)
+            return [format_report(value) for value in store.get_reports(username, 0, PAGE_SIZE)]
+        suite.run('history.first_page', first_page, params)
+        suite.run('history.format_all',
+                  lambda: [format_report(value) for value in store.get_reports(username)], params)
+    store.close()
+
+
+# =========================
+# Output
+# =========================
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {
+            (r['name'], json.dumps(r['params'], sort_keys=True)): r['best'] for r in json.load(f)['results']
+        }
+    print(f'\ncompared with {baseline_path} (best time, new / old):', file=sys.stderr)
+    for r in results:
+        old = baseline.get((r['name'], json.dumps(r['params'], sort_keys=True)))
+        if old:
+            print(f'  {r["name"]:<32} {r["best"] / old:6.2f}x', file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scoring and storage micro-benchmarks (JSON output).')
+    parser.add_argument('-o', '--output', help='write results here (default: stdout)')
+    parser.add_argument('-k', dest='pattern', help='only run cases whose name contains this')
+    parser.add_argument('--users', default='1000,10000,100000', help='comma-separated user counts')
+    parser.add_argument('--reports', default='0,10', help='comma-separated reports per user')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help='small store sizes and 3 repeats')
+    parser.add_argument('--compare', metavar='JSON', help='print ratios against an earlier run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    user_counts = [int(n) for n in args.users.split(',')]
+    report_counts = [int(n) for n in args.reports.split(',')]
+    if args.quick:
+        user_counts = [n for n in user_counts if n <= 10_000]
+        args.repeat = min(args.repeat, 3)
+
+    rng = random.Random(args.seed)
+    suite = Suite(args.pattern, args.repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        bench_scoring(suite, rng)
+        bench_store(suite, rng, user_counts, report_counts, directory)
+        bench_history(suite, rng, directory)
+
+    output = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'unit': 'seconds per call (per form for batch cases)',
+        },
+        'results': suite.results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+            f.write('\n')
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(suite.results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle
+from kivy.uix.label import Label
+from kivy.uix.layout import Layout
+
+from profiling import tracer
+
+# =========================
+# Kivy tracing hooks
+# =========================
+# Only imported when RISKAPP_TRACE is set. install() must run before any
+# widget is created: layouts capture their bound do_layout in a Clock trigger
+# when they are built, and buttons capture their bound callbacks, so classes
+# patched later would only affect widgets made afterwards.
+OVERLAY_INTERVAL = 0.5
+OVERLAY_KEY = 293  # F12 toggles the overlay
+
+
+def _layout_classes(cls=Layout):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _layout_classes(subclass)
+
+
+def trace_methods(cls, *names):
+    for name in names:
+        if name in cls.__dict__:
+            setattr(cls, name, tracer.wrap(cls.__dict__[name], f'{cls.__name__}.{name}'))
+
+
+def install():
+    for cls in set(_layout_classes()):
+        if 'do_layout' in cls.__dict__:
+            setattr(cls, 'do_layout', tracer.wrap(cls.__dict__['do_layout'], f'{cls.__name__}.do_layout', 'layout'))
+
+
+def attach(screen_manager):
+    previous = [screen_manager.current]
+
+    def switched(sm, target):
+        tracer.begin_switch(previous[0], target)
+        previous[0] = target
+    screen_manager.bind(current=switched)
+    screen_manager.transition.bind(on_complete=lambda *a: tracer.switch_settled())
+
+    overlay = TraceOverlay()
+    Window.add_widget(overlay)
+    Window.bind(on_key_down=lambda window, key, *a: overlay.toggle() if key == OVERLAY_KEY else None)
+    return overlay
+
+
+class TraceOverlay(Label):
+    def __init__(self, **kwargs):
+        super().__init__(size_hint=(None, None), halign='left', valign='top', font_size=13,
+                         markup=False, **kwargs)
+        with self.canvas.before:
+            Color(0, 0, 0, 0.6)
+            self.backdrop = Rectangle()
+        self.bind(texture_size=self._fit)
+        Window.bind(size=lambda *a: self._fit())
+        self.visible = True
+        Clock.schedule_interval(self.refresh, OVERLAY_INTERVAL)
+
+    def _fit(self, *args):
+        self.size = self.texture_size
+        self.pos = (0, Window.height - self.height)
+        self.backdrop.pos = self.pos
+        self.backdrop.size = self.size
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.opacity = 1 if self.visible else 0
+
+    def refresh(self, dt):
+        if not self.visible:
+            return
+        summary = tracer.summary()
+        lines = []
+        if summary['frame_ms'] is not None:
+            lines.append(f'frame {summary["frame_ms"]:.1f} ms  p95 {summary["frame_p95_ms"]:.1f}  '
+                         f'max {summary["frame_max_ms"]:.1f}')
+        slowest = sorted(summary['callbacks'].items(), key=lambda item: -item[1]['max_ms'])[:3]
+        for name, totals in slowest:
+            lines.append(f'{name}: max {totals["max_ms"]:.1f} ms over {totals["calls"]} calls')
+        if summary['switches']:
+            switch = summary['switches'][-1]
+            lines.append(f'{switch["from"]} -> {switch["to"]}: {switch["layout_passes"]} layout passes')
+        text = '\n'.join(lines)
+        if text != self.text:
+            self.text = text
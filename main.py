@@ -1,18 +1,33 @@
-import json
-import hashlib
-import os
-import webbrowser
-
-from kivy.app import App
-from kivy.uix.screenmanager import ScreenManager, Screen
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.button import Button
-from kivy.uix.label import Label
-from kivy.uix.textinput import TextInput
-from kivy.uix.spinner import Spinner
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.gridlayout import GridLayout
-from kivy.graphics import Color, Rectangle
+from concurrent.futures import ThreadPoolExecutor
+
+from profiling import frame_stats, startup_profiler, tracer
+
+startup_profiler.configure()
+frame_stats.configure()
+tracer.configure()
+
+with startup_profiler.measure('import kivy'):
+    from kivy.app import App
+    from kivy.clock import Clock
+    from kivy.logger import Logger
+    from kivy.uix.screenmanager import ScreenManager, Screen
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.uix.button import Button
+    from kivy.uix.label import Label
+    from kivy.uix.textinput import TextInput
+    from kivy.uix.spinner import Spinner
+    from kivy.uix.scrollview import ScrollView
+    from kivy.uix.recycleview import RecycleView
+    from kivy.uix.recycleview.views import RecycleDataViewBehavior
+    from kivy.uix.recycleboxlayout import RecycleBoxLayout
+    from kivy.uix.gridlayout import GridLayout
+
+with startup_profiler.measure('import app modules'):
+    import passwords
+    import scoring
+    from reports import Report, format_report
+    from async_store import AsyncStore
+    from storage import open_configured_store
 
 # =========================
 # Global Colors & Styles
@@ -70,49 +85,72 @@ SPINNER_STYLE = {
     'color': COLORS['ivory'],
 }
 
-USER_FILE = 'users.json'
 current_user = {'username': None}
 
 # =========================
 # Utilities
 # =========================
-def load_users():
-    if os.path.exists(USER_FILE):
-        with open(USER_FILE, 'r') as f:
-            return json.load(f)
-    return {}
-
-def save_users(users):
-    with open(USER_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
-
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def save_user_credentials(username, password):
-    users = load_users()
-    if username in users:
-        return False
-    users[username] = {
-        'password': hash_password(password),
-        'reports': []
-    }
-    save_users(users)
-    return True
-
-def check_user_credentials(username, password):
-    users = load_users()
-    return username in users and users[username]['password'] == hash_password(password)
-
-def set_screen_bg(widget, color_key='dark_blue'):
-    with widget.canvas.before:
-        Color(*COLORS[color_key])
-        widget.bg_rect = Rectangle(size=widget.size, pos=widget.pos)
-    widget.bind(size=lambda *a: _update_bg(widget), pos=lambda *a: _update_bg(widget))
-
-def _update_bg(widget):
-    widget.bg_rect.size = widget.size
-    widget.bg_rect.pos = widget.pos
+# The store is picked by RISKAPP_STORE / RISKAPP_STORE_PATH; see storage.py
+def open_app_store():
+    with startup_profiler.measure('open store'):
+        opened = open_configured_store()
+    startup_profiler.time_first_call(opened, 'get_user', 'first get_user')
+    return opened
+
+def deliver_on_main_thread(callback, result):
+    Clock.schedule_once(lambda dt: callback(result))
+
+# Every store call runs on the store thread: store.call('get_user', name,
+# callback=fn) queues it and fn(result) later runs on the main thread.
+store = AsyncStore(open_app_store, deliver_on_main_thread)
+
+# Password hashing is slow on purpose, so it runs on its own worker thread
+# rather than holding up the store queue.
+password_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='passwords')
+
+def run_in_background(fn, callback, *args):
+    def done(future):
+        Clock.schedule_once(lambda dt: callback(future.result()))
+    password_worker.submit(fn, *args).add_done_callback(done)
+
+def save_user_credentials(username, password_hash, callback, on_error):
+    store.call('create_user', username, password_hash, callback=callback, on_error=on_error)
+
+# A failed rehash leaves the old hash in place; it still verifies, and the
+# upgrade is tried again at the next login.
+def rehash_failed(error):
+    Logger.warning(f'Passwords: could not store the upgraded hash: {error!r}')
+
+# callback(True/False) once the password has been checked, on_error(exception)
+# if the store could not be read; legacy or outdated hashes are replaced after
+# a successful login
+def check_user_credentials(username, password, callback, on_error):
+    def verify(user):
+        stored = user['password'] if user else passwords.dummy_hash()
+
+        def finish(result):
+            matches, new_hash = result
+            if user is not None and matches and new_hash:
+                store.call('update_user', username, password=new_hash, on_error=rehash_failed)
+            callback(user is not None and matches)
+        run_in_background(passwords.verify_and_upgrade, finish, password, stored)
+
+    if username:
+        store.call('get_user', username, callback=verify, on_error=on_error)
+    else:
+        verify(None)
+
+def open_url(url):
+    # webbrowser is only needed once someone taps a link
+    import webbrowser
+    webbrowser.open(url)
+
+# Every screen shares one background: the window's clear colour. Screens draw
+# nothing behind their widgets, so resizes and slide transitions have no
+# background instructions to update.
+def set_window_bg(color_key='dark_blue'):
+    from kivy.core.window import Window
+    Window.clearcolor = COLORS[color_key]
 
 # =========================
 # Screens
@@ -120,7 +158,7 @@ def _update_bg(widget):
 class LoginScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
+        self.checking = False
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
 
@@ -164,21 +202,35 @@ class LoginScreen(Screen):
         self.add_widget(layout)
 
     def login_user(self, instance):
+        if self.checking:
+            return
         username = self.username_input.text.strip()
         password = self.password_input.text.strip()
-        if check_user_credentials(username, password):
+        self.checking = True
+        self.message_label.text = 'Checking...'
+        check_user_credentials(username, password, lambda ok: self._finish_login(username, ok),
+                               self._login_failed)
+
+    def _finish_login(self, username, ok):
+        self.checking = False
+        if ok:
             current_user['username'] = username
             self.username_input.text = ""
             self.password_input.text = ""
+            self.message_label.text = ''
             self.manager.current = 'menu'
         else:
             self.message_label.text = 'Incorrect username or password.'
 
+    def _login_failed(self, error):
+        self.checking = False
+        self.message_label.text = 'Could not check your login. Please try again.'
+
 
 class CreateAccountPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
+        self.creating = False
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=12)
 
@@ -210,20 +262,43 @@ class CreateAccountPage(Screen):
         self.add_widget(layout)
 
     def create_account(self, instance):
+        if self.creating:
+            return
         username = self.name_input.text.strip()
         password = self.password_input.text.strip()
         if not username or not password:
             self.message_label.text = "Please enter username and password."
-        elif save_user_credentials(username, password):
+            return
+        self.creating = True
+        self.message_label.text = 'Creating account...'
+
+        def hash_if_new(user):
+            if user is not None:
+                self._finish_create(False)
+                return
+            run_in_background(
+                passwords.hash_password,
+                lambda password_hash: save_user_credentials(username, password_hash,
+                                                            self._finish_create, self._create_failed),
+                password
+            )
+        store.call('get_user', username, callback=hash_if_new, on_error=self._create_failed)
+
+    def _finish_create(self, created):
+        self.creating = False
+        if created:
             self.message_label.text = 'Account created successfully!'
         else:
             self.message_label.text = 'Username already exists.'
 
+    def _create_failed(self, error):
+        self.creating = False
+        self.message_label.text = 'Account could not be created. Please try again.'
+
 
 class MainMenu(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=12)
 
@@ -257,7 +332,6 @@ class MainMenu(Screen):
 class SourcesPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         layout = BoxLayout(orientation='vertical', padding=30, spacing=20)
 
@@ -267,14 +341,14 @@ class SourcesPage(Screen):
             **BUTTON_STYLE,
             text="CDC Diabetes Prevention Program",
             background_color=COLORS['teal'],
-            on_press=lambda x: webbrowser.open("https://www.cdc.gov/diabetes-prevention/index.html")
+            on_press=lambda x: open_url("https://www.cdc.gov/diabetes-prevention/index.html")
         ))
 
         layout.add_widget(Button(
             **BUTTON_STYLE,
             text="Open Mayo Clinic Diabetes Prevention",
             background_color=COLORS['salmon'],
-            on_press=lambda x: webbrowser.open("https://www.mayoclinic.org/diseases-conditions/type-2-diabetes/in-depth/diabetes-prevention/art-20047639?")
+            on_press=lambda x: open_url("https://www.mayoclinic.org/diseases-conditions/type-2-diabetes/in-depth/diabetes-prevention/art-20047639?")
         ))
 
         layout.add_widget(Button(
@@ -290,7 +364,6 @@ class SourcesPage(Screen):
 class SettingsPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=16)
         layout.add_widget(Label(text='Settings', **LABEL_TITLE_STYLE))
@@ -334,55 +407,72 @@ class SettingsPage(Screen):
         self.add_widget(layout)
 
     def delete_account(self, instance):
-        users = load_users()
         username = current_user['username']
-        if username in users:
-            del users[username]
-            save_users(users)
+        self.confirmation_label.text = 'Deleting account...'
+
+        def deleted(ok):
+            if not ok:
+                self.confirmation_label.text = 'Account could not be deleted.'
+                return
             current_user['username'] = None
             self.confirmation_label.text = 'Account deleted.'
             self.manager.current = 'login'
+        store.call('delete_user', username, callback=deleted, on_error=lambda e: deleted(False))
 
     def clear_reports(self, instance):
-        users = load_users()
         username = current_user['username']
-        if username and username in users:
-            users[username]['reports'] = []
-            save_users(users)
-            self.confirmation_label.text = 'All reports cleared.'
+        if username:
+            self.confirmation_label.text = 'Clearing reports...'
+            self._call_and_confirm('All reports cleared.', 'Reports could not be cleared.', None,
+                                   'clear_reports', username)
 
     def change_password(self, instance):
         new_password = self.new_password_input.text.strip()
         if new_password:
-            users = load_users()
             username = current_user['username']
-            if username in users:
-                users[username]['password'] = hash_password(new_password)
-                save_users(users)
-                self.new_password_input.text = ''
-                self.confirmation_label.text = 'Password updated successfully.'
+            self.confirmation_label.text = 'Updating password...'
+            run_in_background(passwords.hash_password,
+                              lambda password_hash: self._save_password(username, password_hash),
+                              new_password)
+
+    def _save_password(self, username, password_hash):
+        self._call_and_confirm('Password updated successfully.', 'Password could not be updated.',
+                               self.new_password_input, 'update_user', username, password=password_hash)
 
     def update_email(self, instance):
         new_email = self.new_email_input.text.strip()
         if new_email:
-            users = load_users()
             username = current_user['username']
-            if username in users:
-                users[username]['email'] = new_email
-                save_users(users)
-                self.new_email_input.text = ''
-                self.confirmation_label.text = 'Email updated successfully.'
+            self.confirmation_label.text = 'Updating email...'
+            self._call_and_confirm('Email updated successfully.', 'Email could not be updated.',
+                                   self.new_email_input, 'update_user', username, email=new_email)
+
+    # Runs a store call and replaces the pending text with message (clearing
+    # field), or with failure when the store refuses the change or raises.
+    def _call_and_confirm(self, message, failure, field, method, *args, **kwargs):
+        store.call(method, *args, **kwargs,
+                   callback=lambda ok: self._confirm(ok, message, failure, field),
+                   on_error=lambda e: self._confirm(False, message, failure, field))
+
+    def _confirm(self, ok, message, failure, field=None):
+        if not ok:
+            self.confirmation_label.text = failure
+            return
+        if field is not None:
+            field.text = ''
+        self.confirmation_label.text = message
 
 
 class ResultsPage(Screen):
     def __init__(self, result_text='', **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=12)
         layout.add_widget(Label(text='Your Risk Result:', **LABEL_SECTION_STYLE))
         self.result_label = Label(text=result_text, **LABEL_BODY_STYLE)
         layout.add_widget(self.result_label)
+        self.status_label = Label(text='', **LABEL_BODY_STYLE)
+        layout.add_widget(self.status_label)
         layout.add_widget(Button(
             text='Back to Main Menu',
             **BUTTON_STYLE,
@@ -391,30 +481,71 @@ class ResultsPage(Screen):
         ))
         self.add_widget(layout)
 
-    def update_result(self, result_text):
-        self.result_label.text = result_text
-        users = load_users()
-        username = current_user['username']
-        if username in users:
-            users[username].setdefault('reports', []).append(result_text)
-            save_users(users)
+    def update_result(self, report):
+        self.result_label.text = report.result_text()
+        self.status_label.text = 'Saving report...'
+        store.call('append_report', current_user['username'], report.encode(),
+                   callback=self._saved, on_error=lambda e: self._saved(False))
+
+    def _saved(self, ok):
+        self.status_label.text = 'Report saved.' if ok else 'Report could not be saved.'
+
+
+# Rows wrap to the width of the list. A row whose text needs more than one
+# line records its height in its data entry, which is where the RecycleView
+# layout reads row sizes from.
+class ReportRow(RecycleDataViewBehavior, Label):
+    MIN_HEIGHT = 40
+    PADDING = 10
+
+    def __init__(self, **kwargs):
+        super().__init__(halign='left', valign='middle', **LABEL_BODY_STYLE, **kwargs)
+        self.view = None
+        self.index = None
+        self.bind(width=lambda *a: setattr(self, 'text_size', (self.width, None)))
+        self.bind(texture_size=self._fit_height)
+
+    def refresh_view_attrs(self, view, index, data):
+        self.view = view
+        self.index = index
+        return super().refresh_view_attrs(view, index, data)
+
+    def _fit_height(self, *args):
+        if self.view is None or self.index is None or self.index >= len(self.view.data):
+            return
+        height = max(self.MIN_HEIGHT, self.texture_size[1] + self.PADDING)
+        entry = self.view.data[self.index]
+        if entry.get('height', self.MIN_HEIGHT) != height:
+            self.view.data[self.index] = {**entry, 'height': height}
 
 
 class ReportsPage(Screen):
+    # Only the rows in view are instantiated by the RecycleView; reports are
+    # fetched from the store one page at a time as the list is scrolled down.
+    PAGE_SIZE = 50
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=12)
         layout.add_widget(Label(text='Previous Reports', **LABEL_TITLE_STYLE))
 
-        self.reports_label = Label(text='', halign='left', valign='top', **LABEL_BODY_STYLE)
-        self.reports_label.bind(size=self._wrap_text)
-
-        scroll = ScrollView()
-        scroll.add_widget(self.reports_label)
-
-        layout.add_widget(scroll)
+        self.reports_view = RecycleView(viewclass=ReportRow)
+        rows = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, ReportRow.MIN_HEIGHT),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        rows.bind(minimum_height=rows.setter('height'))
+        self.reports_view.add_widget(rows)
+        self.reports_view.bind(scroll_y=self._maybe_load_more)
+        self.loaded = 0
+        self.total_reports = 0
+        self.loading = False
+        self.visit = 0
+
+        layout.add_widget(self.reports_view)
         layout.add_widget(Button(
             text='Back to Main Menu',
             **BUTTON_STYLE,
@@ -424,21 +555,70 @@ class ReportsPage(Screen):
 
         self.add_widget(layout)
 
-    def _wrap_text(self, *args):
-        self.reports_label.text_size = (self.reports_label.width, None)
-
     def on_pre_enter(self):
-        users = load_users()
         username = current_user['username']
-        if username and username in users:
-            reports = users[username].get('reports', [])
-            self.reports_label.text = '\n'.join(reports) if reports else 'No reports yet.'
+        if username:
+            # results of requests made for an earlier visit are dropped
+            self.visit += 1
+            visit = self.visit
+            self.loaded = 0
+            self.total_reports = 0
+            self.loading = True
+            self.reports_view.data = [{'text': 'Loading reports...'}]
+            self.reports_view.scroll_y = 1
+            store.call('count_reports', username, callback=lambda total: self._counted(visit, total),
+                       on_error=lambda e: self._load_failed(visit, e))
+
+    def _counted(self, visit, total):
+        if visit != self.visit:
+            return
+        self.total_reports = total
+        if total:
+            self._load_page()
+        else:
+            self.loading = False
+            self.reports_view.data = [{'text': 'No reports yet.'}]
+
+    def _load_page(self):
+        self.loading = True
+        visit = self.visit
+        store.call('get_reports', current_user['username'], self.loaded, self.PAGE_SIZE,
+                   callback=lambda page: self._show_page(visit, page),
+                   on_error=lambda e: self._load_failed(visit, e))
+
+    def _show_page(self, visit, page):
+        if visit != self.visit:
+            return
+        rows = [{'text': format_report(r)} for r in page]
+        if self.loaded == 0:
+            self.reports_view.data = rows or [{'text': 'No reports yet.'}]
+        else:
+            self.reports_view.data.extend(rows)
+        self.loaded += len(page)
+        # a short page is the last one, even if reports were cleared since the count
+        if len(page) < self.PAGE_SIZE:
+            self.total_reports = self.loaded
+        self.loading = False
+
+    # A failed first page replaces the loading text; a failed later page keeps
+    # what is shown and is asked for again on the next scroll to the bottom.
+    def _load_failed(self, visit, error):
+        if visit != self.visit:
+            return
+        self.loading = False
+        if self.loaded == 0:
+            self.reports_view.data = [{'text': 'Reports could not be loaded.'}]
+
+    def _maybe_load_more(self, view, scroll_y):
+        if scroll_y <= 0.1 and not self.loading and self.loaded < self.total_reports:
+            self._load_page()
 
 
 class InputPage(Screen):
+    PREVIEW_DELAY = 0.15
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         root_layout = BoxLayout(orientation='vertical')
         scroll_view = ScrollView()
@@ -447,26 +627,27 @@ class InputPage(Screen):
 
         layout.add_widget(Label(text='Get a new risk factor', **LABEL_SECTION_STYLE))
 
-        self.categories = {
-            'Age': ['0-30: 0 points', '31-40: 2 points', '41-50: 4 points', '51-60: 6 points', '61+ years: 8 points'],
-            'Family History of Diabetes': ['No immediate family: 0 points', 'One grandparent, uncle/aunt: 3 points', 'One parent or sibling: 6 points', 'Both parents/multiple close relatives: 10 points'],
-            'Blood Pressure Levels': ['Normal (<120/80): 0 points', 'Elevated (120-129/<80): 2 points', 'Stage 1 (130-139/80-89): 5 points', 'Stage 2 (140+/90+): 8 points', 'Crisis (180+/120+): 12 points'],
-            'Blood Sugar Levels (Optional)': ['Normal (<100 mg/dL): 0 points', 'Borderline (100-109 mg/dL): 4 points', 'Prediabetes (110-125 mg/dL): 8 points', 'Diabetes (>125 mg/dL): 15 points'],
-            'Physical Activity Levels': ['Active (5 days/week): 0 points', 'Moderately Active (3-4 days/week): 3 points', 'Low Activity (1-2 days/week): 6 points', 'Sedentary (No exercise): 10 points'],
-            'Estimated Daily Calorie Intake': ['Healthy Intake: 0 points', 'Slightly Excessive: 3 points', 'Overeating: 7 points', 'Extreme Overeating: 12 points'],
-            'Diet Quality/Habits': ['Healthy: 0 points', 'Average: 3 points', 'Poor: 7 points', 'Extremely Unhealthy: 12 points'],
-            'Stress Levels': ['Low Stress: 0 points', 'Moderate Stress: 3 points', 'High Stress: 7 points', 'Chronic Stress: 10 points']
-        }
+        self.categories = scoring.CATEGORY_LABELS
+
+        # live preview: spinner changes update the running score at once, the
+        # label is refreshed at most once per PREVIEW_DELAY
+        self.running_score = scoring.RunningScore()
+        self._preview_trigger = Clock.create_trigger(self._update_preview, self.PREVIEW_DELAY)
 
         self.spinners = {}
-        for category, values in self.categories.items():
+        for position, (category, values) in enumerate(self.categories.items()):
             sub_layout = BoxLayout(orientation='vertical', size_hint_y=None, height=100, spacing=6)
             sub_layout.add_widget(Label(text=f'{category}:', **LABEL_BODY_STYLE))
             spn = Spinner(text='Select Option', values=values, **SPINNER_STYLE)
+            spn.bind(text=lambda spinner, text, position=position, category=category:
+                     self._on_selection(position, category, text))
             self.spinners[category] = spn
             sub_layout.add_widget(spn)
             layout.add_widget(sub_layout)
 
+        self.preview_label = Label(text=self._preview_text(), size_hint_y=None, height=40, **LABEL_BODY_STYLE)
+        layout.add_widget(self.preview_label)
+
         layout.add_widget(Button(
             text='Submit',
             **BUTTON_STYLE,
@@ -484,63 +665,126 @@ class InputPage(Screen):
         root_layout.add_widget(scroll_view)
         self.add_widget(root_layout)
 
+    def _on_selection(self, position, category, text):
+        index = scoring.LABEL_INDEX[category].get(text, scoring.UNSELECTED)
+        if self.running_score.select(position, index):
+            self._preview_trigger()
+
+    def _preview_text(self):
+        total, risk_level = self.running_score.result()
+        return f'Running score: {scoring.format_score(total, risk_level)}'
+
+    def _update_preview(self, dt):
+        text = self._preview_text()
+        if self.preview_label.text != text:
+            self.preview_label.text = text
+
     def submit_form(self, instance):
         selections = {key: spinner.text for key, spinner in self.spinners.items()}
-        risk_score = self.calculate_fake_risk(selections)
-        self.manager.get_screen('results').update_result(f'Estimated Risk Score: {risk_score}')
+        indices = scoring.selection_indices(selections)
+        scores, total, risk_level = scoring.cached_score(indices)
+        report = Report.create(indices, scores, total, risk_level, scoring.SCHEMA_VERSION)
+        self.manager.get_screen('results').update_result(report)
         self.manager.current = 'results'
 
     def calculate_fake_risk(self, selections):
-        def score_from_text(value):
-            if ':' in value:
-                try:
-                    return int(value.split(':')[1].strip().split()[0])
-                except ValueError:
-                    return 0
-            return 0
-
-        age_score = score_from_text(selections.get('Age', '0: 0'))
-        family_history_score = score_from_text(selections.get('Family History of Diabetes', '0: 0'))
-        bp_score = score_from_text(selections.get('Blood Pressure Levels', '0: 0'))
-        blood_sugar_score = score_from_text(selections.get('Blood Sugar Levels (Optional)', '0: 0'))
-        activity_score = score_from_text(selections.get('Physical Activity Levels', '0: 0'))
-        calorie_score = score_from_text(selections.get('Estimated Daily Calorie Intake', '0: 0'))
-        diet_score = score_from_text(selections.get('Diet Quality/Habits', '0: 0'))
-        stress_score = score_from_text(selections.get('Stress Levels', '0: 0'))
-
-        risk1 = age_score * family_history_score
-        risk2 = bp_score * blood_sugar_score
-        risk3 = stress_score * diet_score
-        risk4 = calorie_score * (10 - activity_score)
-
-        total = (
-            age_score + family_history_score + bp_score + blood_sugar_score +
-            activity_score + calorie_score + diet_score + stress_score +
-            0.5 * risk1 + 0.6 * risk2 + 0.4 * risk3 + 0.7 * risk4
-        )
+        return scoring.calculate_fake_risk(selections)
 
-        total = round(total, 2)
-
-        if total <= 45:
-            risk_level = "Low Risk"
-        elif total <= 85:
-            risk_level = "Moderate Risk"
-        else:
-            risk_level = "High Risk"
+# =========================
+# App
+# =========================
+class LazyScreenManager(ScreenManager):
+    # Screens are registered as factories and only constructed the first time
+    # something navigates to them or asks for them with get_screen().
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {}
+
+    def register(self, name, factory):
+        self.factories[name] = factory
+
+    def _build_screen(self, name):
+        with startup_profiler.measure(f'build screen {name}'):
+            screen = self.factories.pop(name)(name=name)
+        self.add_widget(screen)
+        return screen
+
+    def get_screen(self, name):
+        if name in self.factories:
+            return self._build_screen(name)
+        return super().get_screen(name)
+
+    def has_screen(self, name):
+        return name in self.factories or super().has_screen(name)
+
+    def prewarm(self, *args):
+        # one screen per frame so the main loop never stalls on several at once
+        if self.factories:
+            self._build_screen(next(iter(self.factories)))
+            Clock.schedule_once(self.prewarm, 0)
+
+
+# Opt-in with RISKAPP_TRACE: frames, layout passes and the callbacks below
+# are timed, shown in an overlay (F12 hides it) and written as a Chrome trace
+# on exit. Must run before any widget exists; see instrumentation.py.
+def install_tracing():
+    import instrumentation
+    instrumentation.install()
+    instrumentation.trace_methods(LoginScreen, 'login_user', '_finish_login')
+    instrumentation.trace_methods(InputPage, 'submit_form', '_update_preview')
+    instrumentation.trace_methods(ResultsPage, 'update_result')
+    instrumentation.trace_methods(ReportsPage, '_show_page')
+    for screen in (LoginScreen, CreateAccountPage, MainMenu, SourcesPage,
+                   SettingsPage, ResultsPage, ReportsPage, InputPage):
+        instrumentation.trace_methods(screen, 'on_pre_enter')
 
-        return f"{total} ({risk_level})"
 
 class RiskApp(App):
+    # build the remaining screens on idle frames after the login screen is up
+    prewarm_screens = True
+
+    def on_start(self):
+        store.call('start_compactor')
+        frame_stats.start(Clock, lambda: store.pending > 0)
+        if self.prewarm_screens:
+            Clock.schedule_once(self.root.prewarm, 0.5)
+        if startup_profiler.enabled:
+            from kivy.core.window import Window
+
+            def first_frame(*args):
+                Window.unbind(on_flip=first_frame)
+                startup_profiler.mark('first frame')
+                startup_profiler.dump()
+            Window.bind(on_flip=first_frame)
+
+    def on_stop(self):
+        store.close()
+        startup_profiler.dump()
+        frame_stats.dump()
+        tracer.dump()
+
     def build(self):
-        sm = ScreenManager()
-        sm.add_widget(LoginScreen(name='login'))
-        sm.add_widget(CreateAccountPage(name='create_account'))
-        sm.add_widget(MainMenu(name='menu'))
-        sm.add_widget(InputPage(name='input'))
-        sm.add_widget(SourcesPage(name='sources'))
-        sm.add_widget(SettingsPage(name='settings'))
-        sm.add_widget(ResultsPage(name='results'))
-        sm.add_widget(ReportsPage(name='reports'))
+        if tracer.enabled:
+            install_tracing()
+        with startup_profiler.measure('RiskApp.build'):
+            set_window_bg('dark_blue')
+            root = self._build_root()
+        if tracer.enabled:
+            import instrumentation
+            instrumentation.attach(root)
+        return root
+
+    def _build_root(self):
+        sm = LazyScreenManager()
+        sm.register('login', LoginScreen)
+        sm.register('create_account', CreateAccountPage)
+        sm.register('menu', MainMenu)
+        sm.register('input', InputPage)
+        sm.register('sources', SourcesPage)
+        sm.register('settings', SettingsPage)
+        sm.register('results', ResultsPage)
+        sm.register('reports', ReportsPage)
+        sm.current = 'login'
         return sm
 
 if __name__ == '__main__':
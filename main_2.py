@@ -1,9 +1,9 @@
-import json
-import hashlib
-import os
 import webbrowser
 
+from concurrent.futures import ThreadPoolExecutor
+
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
@@ -12,10 +12,13 @@ from kivy.uix.textinput import TextInput
 from kivy.uix.spinner import Spinner
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.gridlayout import GridLayout
-from kivy.graphics import Color, Rectangle
- 
-USER_FILE = 'users.json'
+from kivy.core.window import Window
 
+import passwords
+import scoring
+from reports import Report, format_report
+from storage import open_configured_store
+ 
 current_user = {'username': None}
 
 
@@ -24,44 +27,47 @@ current_user = {'username': None}
 #salmon (0.98,0.5,0.44,1)
 #dark blue (0.18,0.31,0.38,1)
 
-def load_users():
-    if os.path.exists(USER_FILE):
-        with open(USER_FILE, 'r') as f:
-            return json.load(f)
-    return {}
-
-def save_users(users):
-    with open(USER_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
-
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def save_user_credentials(username, password):
-    users = load_users()
-    if username in users:
-        return False
-    users[username] = {
-        'password': hash_password(password),
-        'reports': []
-    }
-    save_users(users)
-    return True
-
-def check_user_credentials(username, password):
-    users = load_users()
-    return username in users and users[username]['password'] == hash_password(password)
+# The same store main.py uses (RISKAPP_STORE / RISKAPP_STORE_PATH), so
+# accounts and reports are shared with it.
+store = open_configured_store()
+
+# Password hashing is slow on purpose, so it runs on a worker thread and the
+# result comes back to the UI thread through Clock. Store calls stay on the UI
+# thread: SQLite connections only work on the thread that opened them.
+password_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='passwords')
+
+def run_in_background(fn, callback, *args):
+    def done(future):
+        Clock.schedule_once(lambda dt: callback(future.result()))
+    password_worker.submit(fn, *args).add_done_callback(done)
+
+# Each of these calls callback(True/False) on the UI thread when done.
+def save_user_credentials(username, password, callback):
+    run_in_background(passwords.hash_password,
+                      lambda password_hash: callback(store.create_user(username, password_hash)),
+                      password)
+
+def change_user_password(username, password, callback):
+    run_in_background(passwords.hash_password,
+                      lambda password_hash: callback(store.update_user(username, password=password_hash)),
+                      password)
+
+# legacy or outdated hashes are replaced after a successful login
+def check_user_credentials(username, password, callback):
+    user = store.get_user(username)
+    stored = user['password'] if user else passwords.dummy_hash()
+
+    def finish(result):
+        matches, new_hash = result
+        if user is not None and matches and new_hash:
+            store.update_user(username, password=new_hash)
+        callback(user is not None and matches)
+    run_in_background(passwords.verify_and_upgrade, finish, password, stored)
 
 class LoginScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-
-        # background
-        with self.canvas.before:
-            from kivy.graphics import Color, Rectangle
-            Color(0.18, 0.31, 0.38, 1)
-            self.bg_rect = Rectangle(size=self.size, pos=self.pos)
-        self.bind(size=self._update_bg, pos=self._update_bg)
+        self.checking = False
 
         # layout
         self.layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
@@ -127,32 +133,30 @@ class LoginScreen(Screen):
     def login_user(self, instance):
         username = self.username_input.text.strip()
         password = self.password_input.text.strip()
-        if check_user_credentials(username, password):
+        if not self.checking:
+            self.checking = True
+            self.message_label.text = 'Checking...'
+            check_user_credentials(username, password, lambda ok: self._finish_login(username, ok))
+
+    def _finish_login(self, username, ok):
+        self.checking = False
+        if ok:
             current_user['username'] = username
 
             self.username_input.text = ""
             self.password_input.text = ""
+            self.message_label.text = ''
 
             self.manager.current = 'menu'
         else:
             self.message_label.text = 'Incorrect username or password.'
-    def _update_bg(self, *args):
-        self.bg_rect.size = self.size
-        self.bg_rect.pos = self.pos
-
 
 
 
 class CreateAccountPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        with self.canvas.before:
-            from kivy.graphics import Color,Rectangle
-            Color(0.18, 0.31, 0.38, 1)
-            #Color(0.5, 0.5, 0.5, 1) 
-            self.bg_rect = Rectangle(size=self.size, pos=self.pos)
-
-        self.bind(size=self._update_bg, pos=self._update_bg)
+        self.creating = False
         self.layout = BoxLayout(orientation='vertical', padding=20, spacing=10)
         self.layout.add_widget(Label(text='Create an Account', font_size=30, bold=True))
         self.name_input = TextInput(hint_text='Enter your name')
@@ -179,26 +183,22 @@ class CreateAccountPage(Screen):
         password = self.password_input.text.strip()
         if not username or not password:
             self.message_label.text = "Please enter username and password."
-        elif save_user_credentials(username, password):
+        elif not self.creating:
+            self.creating = True
+            self.message_label.text = 'Creating account...'
+            save_user_credentials(username, password, self._finish_create)
+
+    def _finish_create(self, created):
+        self.creating = False
+        if created:
             self.message_label.text = 'Account created successfully!'
         else:
             self.message_label.text = 'Username already exists.'
-    
-    def _update_bg(self, *args):
-        self.bg_rect.size = self.size
-        self.bg_rect.pos = self.pos
 
 class MainMenu(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-        with self.canvas.before:
-            from kivy.graphics import Color, Rectangle
-            Color(0.18,0.31,0.38,1) 
-            self.bg_rect = Rectangle(size=self.size, pos=self.pos)
-
-        self.bind(size=self.update_bg, pos=self.update_bg)
-
         self.layout = BoxLayout(orientation='vertical', padding=20, spacing=10)
 
         # Store the title label so we can update it later
@@ -227,10 +227,6 @@ class MainMenu(Screen):
 
         self.add_widget(self.layout)
 
-    def update_bg(self, *args):
-        self.bg_rect.size = self.size
-        self.bg_rect.pos = self.pos
-
     def on_pre_enter(self):
         # Set title when the screen is shown
         self.title_label.text = f'Main Menu - {current_user["username"]}'
@@ -239,13 +235,6 @@ class SourcesPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-        with self.canvas.before:
-            from kivy.graphics import Color, Rectangle
-            Color(0.18,0.31,0.38,1) 
-            self.bg_rect = Rectangle(size=self.size, pos=self.pos)
-
-        self.bind(size=self.update_bg, pos=self.update_bg)
-
         layout = BoxLayout(orientation='vertical', padding=20, spacing=10)
         layout.add_widget(Label(text='Helpful Sources & Links', font_size=30, bold=True))
         layout.add_widget(Label(text='[List of helpful resources will go here]'))
@@ -253,30 +242,16 @@ class SourcesPage(Screen):
         layout.add_widget(Button(text='Back to Main Menu', on_press=lambda x: setattr(self.manager, 'current', 'menu')))
         self.add_widget(layout)
 
-    def update_bg(self, *args):
-        self.bg_rect.size = self.size
-        self.bg_rect.pos = self.pos
-
 class SettingsPage(Screen):
     def delete_account(self, instance):
-        users = load_users()
         username = current_user['username']
-        if username in users:
-            del users[username]
-            save_users(users)
+        if username and store.delete_user(username):
             current_user['username'] = None
             self.confirmation_label.text = 'Account deleted.'
             self.manager.current = 'login'
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-        with self.canvas.before:
-            from kivy.graphics import Color, Rectangle
-            Color(0.18,0.31,0.38,1) 
-            self.bg_rect = Rectangle(size=self.size, pos=self.pos)
-
-        self.bind(size=self.update_bg, pos=self.update_bg)
-
         layout = BoxLayout(orientation='vertical', padding=20, spacing=20)
         layout.add_widget(Label(text='Settings', font_size=30, bold=True))
 
@@ -312,57 +287,42 @@ class SettingsPage(Screen):
         self.add_widget(layout)
 
     def clear_reports(self, instance):
-        users = load_users()
         username = current_user['username']
-        if username and username in users:
-            users[username]['reports'] = []
-            save_users(users)
+        if username and store.clear_reports(username):
             self.confirmation_label.text = 'All reports cleared.'
 
     def change_password(self, instance):
         new_password = self.new_password_input.text.strip()
         if new_password:
-            users = load_users()
             username = current_user['username']
-            if username in users:
-                users[username]['password'] = hash_password(new_password)
-                save_users(users)
-                self.new_password_input.text = ''
-                self.confirmation_label.text = 'Password updated successfully.'
+            if username:
+                self.confirmation_label.text = 'Updating password...'
+                change_user_password(username, new_password, self._password_changed)
+
+    def _password_changed(self, ok):
+        if ok:
+            self.new_password_input.text = ''
+            self.confirmation_label.text = 'Password updated successfully.'
+        else:
+            self.confirmation_label.text = 'Password could not be updated.'
 
     def update_email(self, instance):
         new_email = self.new_email_input.text.strip()
         if new_email:
-            users = load_users()
             username = current_user['username']
-            if username in users:
-                users[username]['email'] = new_email
-                save_users(users)
+            if username and store.update_user(username, email=new_email):
                 self.new_email_input.text = ''
                 self.confirmation_label.text = 'Email updated successfully.'
 
     def clear_reports(self, instance):
-        users = load_users()
         username = current_user['username']
-        if username and username in users:
-            users[username]['reports'] = []
-            save_users(users)
-
-    def update_bg(self, *args):
-        self.bg_rect.size = self.size
-        self.bg_rect.pos = self.pos
+        if username:
+            store.clear_reports(username)
 
 class ResultsPage(Screen):
     def __init__(self, result_text='', **kwargs):
         super().__init__(**kwargs)
 
-        with self.canvas.before:
-            from kivy.graphics import Color, Rectangle
-            Color(0.18,0.31,0.38,1) 
-            self.bg_rect = Rectangle(size=self.size, pos=self.pos)
-
-        self.bind(size=self.update_bg, pos=self.update_bg)
-
         self.layout = BoxLayout(orientation='vertical', padding=20, spacing=10)
         self.label = Label(text='Your Risk Result:', font_size=25)
         self.result_label = Label(text=result_text, font_size=20)
@@ -371,29 +331,16 @@ class ResultsPage(Screen):
         self.layout.add_widget(Button(text='Back to Main Menu', on_press=lambda x: setattr(self.manager, 'current', 'menu')))
         self.add_widget(self.layout)
 
-    def update_result(self, result_text):
-        self.result_label.text = result_text
-        users = load_users()
+    def update_result(self, report):
+        self.result_label.text = report.result_text()
         username = current_user['username']
-        if username in users:
-            users[username].setdefault('reports', []).append(result_text)
-            save_users(users)
-
-    def update_bg(self, *args):
-        self.bg_rect.size = self.size
-        self.bg_rect.pos = self.pos
+        if username:
+            store.append_report(username, report.encode())
 
 class ReportsPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-        with self.canvas.before:
-            from kivy.graphics import Color, Rectangle
-            Color(0.18,0.31,0.38,1) 
-            self.bg_rect = Rectangle(size=self.size, pos=self.pos)
-
-        self.bind(size=self.update_bg, pos=self.update_bg)
-
         layout = BoxLayout(orientation='vertical', padding=20, spacing=10)
         layout.add_widget(Label(text='Previous Reports', font_size=30, bold=True))
 
@@ -408,27 +355,15 @@ class ReportsPage(Screen):
         self.add_widget(layout)
 
     def on_pre_enter(self):
-        users = load_users()
         username = current_user['username']
-        if username and username in users:
-            reports = users[username].get('reports', [])
-            self.reports_label.text = '\n'.join(reports) if reports else 'No reports yet.'
-
-    def update_bg(self, *args):
-        self.bg_rect.size = self.size
-        self.bg_rect.pos = self.pos
+        if username:
+            reports = store.get_reports(username)
+            self.reports_label.text = '\n'.join(map(format_report, reports)) if reports else 'No reports yet.'
 
 class InputPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-        with self.canvas.before:
-            from kivy.graphics import Color, Rectangle
-            Color(0.18,0.31,0.38,1) 
-            self.bg_rect = Rectangle(size=self.size, pos=self.pos)
-
-        self.bind(size=self.update_bg, pos=self.update_bg)
-
         root_layout = BoxLayout(orientation='vertical')
         scroll_view = ScrollView()
         layout = GridLayout(cols=1, padding=20, spacing=10, size_hint_y=None)
@@ -464,53 +399,16 @@ class InputPage(Screen):
 
     def submit_form(self, instance):
         selections = {key: spinner.text for key, spinner in self.spinners.items()}
-        risk_score = self.calculate_fake_risk(selections)
-        self.manager.get_screen('results').update_result(f'Estimated Risk Score: {risk_score}')
+        indices = [scoring.LABEL_INDEX[name].get(selections.get(name), scoring.UNSELECTED)
+                   for name in scoring.CATEGORY_NAMES]
+        report = Report.create(indices, *scoring.score(indices), scoring.SCHEMA_VERSION)
+        self.manager.get_screen('results').update_result(report)
         self.manager.current = 'results'
 
-    def calculate_fake_risk(self, selections):
-        def score_from_text(value):
-            if ':' in value:
-                return int(value.split(':')[1].strip().split()[0])
-            return 0
-
-        age_score = score_from_text(selections['Age'])
-        family_history_score = score_from_text(selections['Family History of Diabetes'])
-        bp_score = score_from_text(selections['Blood Pressure Levels'])
-        blood_sugar_score = score_from_text(selections['Blood Sugar Levels (Optional)'])
-        activity_score = score_from_text(selections['Physical Activity Levels'])
-        calorie_score = score_from_text(selections['Estimated Daily Calorie Intake'])
-        diet_score = score_from_text(selections['Diet Quality/Habits'])
-        stress_score = score_from_text(selections['Stress Levels'])
-
-        risk1 = age_score * family_history_score
-        risk2 = bp_score * blood_sugar_score
-        risk3 = stress_score * diet_score
-        risk4 = calorie_score * (10 - activity_score)
-
-        total = (
-        age_score + family_history_score + bp_score + blood_sugar_score +
-        activity_score + calorie_score + diet_score + stress_score +
-        0.5 * risk1 + 0.6 * risk2 + 0.4 * risk3 + 0.7 * risk4
-        )
-
-        total = round(total, 2)
-
-        if total <= 45:
-            risk_level = "Low Risk"
-        elif total <= 85:
-            risk_level = "Moderate Risk"
-        else:
-            risk_level = "High Risk"
-
-        return f"{total} ({risk_level})"
-
-    def update_bg(self, *args):
-        self.bg_rect.size = self.size
-        self.bg_rect.pos = self.pos
-
 class RiskApp(App):
     def build(self):
+        # one background behind every screen instead of a rectangle in each
+        Window.clearcolor = (0.18, 0.31, 0.38, 1)
         sm = ScreenManager()
         sm.add_widget(LoginScreen(name='login'))
         sm.add_widget(CreateAccountPage(name='create_account'))
@@ -522,5 +420,8 @@ class RiskApp(App):
         sm.add_widget(ReportsPage(name='reports'))
         return sm
 
+    def on_stop(self):
+        store.close()
+
 if __name__ == '__main__':
     RiskApp().run()
\ No newline at end of file
@@ -1,11 +1,8 @@
-import json
-import hashlib
-import os
-import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.screenmanager import ScreenManager, Screen
-from kivy.uix.popup import Popup
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
@@ -13,7 +10,12 @@ from kivy.uix.textinput import TextInput
 from kivy.uix.spinner import Spinner
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.gridlayout import GridLayout
-from kivy.graphics import Color, Rectangle
+from kivy.core.window import Window
+
+import passwords
+import scoring
+from reports import Report, format_report
+from storage import open_configured_store
 
 # =========================
 # Global Colors & Styles
@@ -72,49 +74,55 @@ SPINNER_STYLE = {
     'color': COLORS['ivory'],
 }
 
-USER_FILE = 'users.json'
 current_user = {'username': None}
 
 # =========================
 # Utilities
 # =========================
-def load_users():
-    if os.path.exists(USER_FILE):
-        with open(USER_FILE, 'r') as f:
-            return json.load(f)
-    return {}
-
-def save_users(users):
-    with open(USER_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
-
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def save_user_credentials(username, password):
-    users = load_users()
-    if username in users:
-        return False
-    users[username] = {
-        'password': hash_password(password),
-        'reports': []
-    }
-    save_users(users)
-    return True
-
-def check_user_credentials(username, password):
-    users = load_users()
-    return username in users and users[username]['password'] == hash_password(password)
-
-def set_screen_bg(widget, color_key='dark_blue'):
-    with widget.canvas.before:
-        Color(*COLORS[color_key])
-        widget.bg_rect = Rectangle(size=widget.size, pos=widget.pos)
-    widget.bind(size=lambda *a: _update_bg(widget), pos=lambda *a: _update_bg(widget))
-
-def _update_bg(widget):
-    widget.bg_rect.size = widget.size
-    widget.bg_rect.pos = widget.pos
+# The same store main.py uses (RISKAPP_STORE / RISKAPP_STORE_PATH), so
+# accounts and reports are shared with it.
+store = open_configured_store()
+
+# Password hashing is slow on purpose, so it runs on a worker thread and the
+# result comes back to the UI thread through Clock. Store calls stay on the UI
+# thread: SQLite connections only work on the thread that opened them.
+password_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='passwords')
+
+def run_in_background(fn, callback, *args):
+    def done(future):
+        Clock.schedule_once(lambda dt: callback(future.result()))
+    password_worker.submit(fn, *args).add_done_callback(done)
+
+# Each of these calls callback(True/False) on the UI thread when done.
+def save_user_credentials(username, password, callback):
+    run_in_background(passwords.hash_password,
+                      lambda password_hash: callback(store.create_user(username, password_hash)),
+                      password)
+
+def change_user_password(username, password, callback):
+    run_in_background(passwords.hash_password,
+                      lambda password_hash: callback(store.update_user(username, password=password_hash)),
+                      password)
+
+# legacy or outdated hashes are replaced after a successful login
+def check_user_credentials(username, password, callback):
+    user = store.get_user(username)
+    stored = user['password'] if user else passwords.dummy_hash()
+
+    def finish(result):
+        matches, new_hash = result
+        if user is not None and matches and new_hash:
+            store.update_user(username, password=new_hash)
+        callback(user is not None and matches)
+    run_in_background(passwords.verify_and_upgrade, finish, password, stored)
+
+def open_url(url):
+    import webbrowser
+    webbrowser.open(url)
+
+# Every screen shares one background: the window's clear colour.
+def set_window_bg(color_key='dark_blue'):
+    Window.clearcolor = COLORS[color_key]
 
 # =========================
 # Screens
@@ -122,7 +130,7 @@ def _update_bg(widget):
 class LoginScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
+        self.checking = False
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
 
@@ -170,10 +178,18 @@ class LoginScreen(Screen):
         password = self.password_input.text.strip()
         if not username or not password:
             self.message_label.text = "Please enter username and password."
-        elif check_user_credentials(username, password):
+        elif not self.checking:
+            self.checking = True
+            self.message_label.text = 'Checking...'
+            check_user_credentials(username, password, lambda ok: self._finish_login(username, ok))
+
+    def _finish_login(self, username, ok):
+        self.checking = False
+        if ok:
             current_user['username'] = username
             self.username_input.text = ""
             self.password_input.text = ""
+            self.message_label.text = ''
             self.manager.current = 'menu'
         else:
             self.message_label.text = 'Incorrect username or password.'
@@ -184,7 +200,7 @@ class LoginScreen(Screen):
 class CreateAccountPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
+        self.creating = False
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=12)
 
@@ -220,7 +236,14 @@ class CreateAccountPage(Screen):
         password = self.password_input.text.strip()
         if not username or not password:
             self.message_label.text = "Please enter username and password."
-        elif save_user_credentials(username, password):
+        elif not self.creating:
+            self.creating = True
+            self.message_label.text = 'Creating account...'
+            save_user_credentials(username, password, self._finish_create)
+
+    def _finish_create(self, created):
+        self.creating = False
+        if created:
             self.message_label.text = 'Account created successfully!'
         else:
             self.message_label.text = 'Username already exists.'
@@ -229,7 +252,6 @@ class CreateAccountPage(Screen):
 class MainMenu(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=12)
 
@@ -263,7 +285,6 @@ class MainMenu(Screen):
 class SourcesPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         layout = BoxLayout(orientation='vertical', padding=30, spacing=20)
 
@@ -273,14 +294,14 @@ class SourcesPage(Screen):
             **BUTTON_STYLE,
             text="CDC Diabetes Prevention Program",
             background_color=COLORS['teal'],
-            on_press=lambda x: webbrowser.open("https://www.cdc.gov/diabetes-prevention/index.html")
+            on_press=lambda x: open_url("https://www.cdc.gov/diabetes-prevention/index.html")
         ))
 
         layout.add_widget(Button(
             **BUTTON_STYLE,
             text="Open Mayo Clinic Diabetes Prevention",
             background_color=COLORS['salmon'],
-            on_press=lambda x: webbrowser.open("https://www.mayoclinic.org/diseases-conditions/type-2-diabetes/in-depth/diabetes-prevention/art-20047639?")
+            on_press=lambda x: open_url("https://www.mayoclinic.org/diseases-conditions/type-2-diabetes/in-depth/diabetes-prevention/art-20047639?")
         ))
 
         layout.add_widget(Button(
@@ -296,7 +317,6 @@ class SourcesPage(Screen):
 class SettingsPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=16)
         layout.add_widget(Label(text='Settings', **LABEL_TITLE_STYLE))
@@ -343,6 +363,8 @@ class SettingsPage(Screen):
 
 
     def show_confirmation(self, message, confirm_callback):
+        from kivy.uix.popup import Popup
+
         box = BoxLayout(orientation='vertical', padding=20, spacing=10)
         box.add_widget(Label(text=message, **LABEL_BODY_STYLE))
         
@@ -374,11 +396,8 @@ class SettingsPage(Screen):
         )
 
     def confirm_delete_account(self):
-        users = load_users()
         username = current_user['username']
-        if username in users:
-            del users[username]
-            save_users(users)
+        if username and store.delete_user(username):
             current_user['username'] = None
             self.confirmation_label.text = 'Account deleted.'
             self.manager.current = 'login'
@@ -390,32 +409,30 @@ class SettingsPage(Screen):
         )
 
     def confirm_clear_reports(self):
-        users = load_users()
         username = current_user['username']
-        if username and username in users:
-            users[username]['reports'] = []
-            save_users(users)
+        if username and store.clear_reports(username):
             self.confirmation_label.text = 'All reports cleared.'
 
     def change_password(self, instance):
         new_password = self.new_password_input.text.strip()
         if new_password:
-            users = load_users()
             username = current_user['username']
-            if username in users:
-                users[username]['password'] = hash_password(new_password)
-                save_users(users)
-                self.new_password_input.text = ''
-                self.confirmation_label.text = 'Password updated successfully.'
+            if username:
+                self.confirmation_label.text = 'Updating password...'
+                change_user_password(username, new_password, self._password_changed)
+
+    def _password_changed(self, ok):
+        if ok:
+            self.new_password_input.text = ''
+            self.confirmation_label.text = 'Password updated successfully.'
+        else:
+            self.confirmation_label.text = 'Password could not be updated.'
 
     def update_email(self, instance):
         new_email = self.new_email_input.text.strip()
         if new_email:
-            users = load_users()
             username = current_user['username']
-            if username in users:
-                users[username]['email'] = new_email
-                save_users(users)
+            if username and store.update_user(username, email=new_email):
                 self.new_email_input.text = ''
                 self.confirmation_label.text = 'Email updated successfully.'
 
@@ -423,7 +440,6 @@ class SettingsPage(Screen):
 class ResultsPage(Screen):
     def __init__(self, result_text='', **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=12)
         layout.add_widget(Label(text='Your Risk Result:', **LABEL_SECTION_STYLE))
@@ -437,19 +453,16 @@ class ResultsPage(Screen):
         ))
         self.add_widget(layout)
 
-    def update_result(self, result_text):
-        self.result_label.text = result_text
-        users = load_users()
+    def update_result(self, report):
+        self.result_label.text = report.result_text()
         username = current_user['username']
-        if username in users:
-            users[username].setdefault('reports', []).append(result_text)
-            save_users(users)
+        if username:
+            store.append_report(username, report.encode())
 
 
 class ReportsPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         layout = BoxLayout(orientation='vertical', padding=20, spacing=12)
         layout.add_widget(Label(text='Previous Reports', **LABEL_TITLE_STYLE))
@@ -474,17 +487,15 @@ class ReportsPage(Screen):
         self.reports_label.text_size = (self.reports_label.width, None)
 
     def on_pre_enter(self):
-        users = load_users()
         username = current_user['username']
-        if username and username in users:
-            reports = users[username].get('reports', [])
-            self.reports_label.text = '\n'.join(reports) if reports else 'No reports yet.'
+        if username:
+            reports = store.get_reports(username)
+            self.reports_label.text = '\n'.join(map(format_report, reports)) if reports else 'No reports yet.'
 
 
 class InputPage(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        set_screen_bg(self, 'dark_blue')
 
         root_layout = BoxLayout(orientation='vertical')
         scroll_view = ScrollView()
@@ -532,52 +543,15 @@ class InputPage(Screen):
 
     def submit_form(self, instance):
         selections = {key: spinner.text for key, spinner in self.spinners.items()}
-        risk_score = self.calculate_fake_risk(selections)
-        self.manager.get_screen('results').update_result(f'Estimated Risk Score: {risk_score}')
+        indices = [scoring.LABEL_INDEX[name].get(selections.get(name), scoring.UNSELECTED)
+                   for name in scoring.CATEGORY_NAMES]
+        report = Report.create(indices, *scoring.score(indices), scoring.SCHEMA_VERSION)
+        self.manager.get_screen('results').update_result(report)
         self.manager.current = 'results'
 
-    def calculate_fake_risk(self, selections):
-        def score_from_text(value):
-            if ':' in value:
-                try:
-                    return int(value.split(':')[1].strip().split()[0])
-                except ValueError:
-                    return 0
-            return 0
-
-        age_score = score_from_text(selections.get('Age', '0: 0'))
-        family_history_score = score_from_text(selections.get('Family History of Diabetes', '0: 0'))
-        bp_score = score_from_text(selections.get('Blood Pressure Levels', '0: 0'))
-        blood_sugar_score = score_from_text(selections.get('Blood Sugar Levels (Optional)', '0: 0'))
-        activity_score = score_from_text(selections.get('Physical Activity Levels', '0: 0'))
-        calorie_score = score_from_text(selections.get('Estimated Daily Calorie Intake', '0: 0'))
-        diet_score = score_from_text(selections.get('Diet Quality/Habits', '0: 0'))
-        stress_score = score_from_text(selections.get('Stress Levels', '0: 0'))
-
-        risk1 = age_score * family_history_score
-        risk2 = bp_score * blood_sugar_score
-        risk3 = stress_score * diet_score
-        risk4 = calorie_score * (10 - activity_score)
-
-        total = (
-            age_score + family_history_score + bp_score + blood_sugar_score +
-            activity_score + calorie_score + diet_score + stress_score +
-            0.5 * risk1 + 0.6 * risk2 + 0.4 * risk3 + 0.7 * risk4
-        )
-
-        total = round(total, 2)
-
-        if total <= 45:
-            risk_level = "Low Risk"
-        elif total <= 85:
-            risk_level = "Moderate Risk"
-        else:
-            risk_level = "High Risk"
-
-        return f"{total} ({risk_level})"
-
 class RiskApp(App):
     def build(self):
+        set_window_bg('dark_blue')
         sm = ScreenManager()
         sm.add_widget(LoginScreen(name='login'))
         sm.add_widget(CreateAccountPage(name='create_account'))
@@ -589,5 +563,8 @@ class RiskApp(App):
         sm.add_widget(ReportsPage(name='reports'))
         return sm
 
+    def on_stop(self):
+        store.close()
+
 if __name__ == '__main__':
     RiskApp().run()
\ No newline at end of file
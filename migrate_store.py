@@ -0,0 +1,37 @@
+import argparse
+
+from storage import BACKENDS, open_store
+
+# Copies every account and report from one store into another, e.g. from the
+# single users.json document into the per-user sharded layout:
+#
+#   python migrate_store.py json users.json sharded users
+
+
+def migrate(source, target):
+    users = source.load_all()
+    target.import_users(users)
+    return len(users), sum(len(user.get('reports', [])) for user in users.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate users between storage backends.')
+    parser.add_argument('source_backend', choices=sorted(BACKENDS))
+    parser.add_argument('source_path')
+    parser.add_argument('target_backend', choices=sorted(BACKENDS))
+    parser.add_argument('target_path')
+    args = parser.parse_args()
+
+    source = open_store(args.source_backend, args.source_path)
+    target = open_store(args.target_backend, args.target_path)
+    try:
+        accounts, reports = migrate(source, target)
+    finally:
+        source.close()
+        target.close()
+    print(f'Migrated {accounts} accounts and {reports} reports '
+          f'from {args.source_backend}:{args.source_path} to {args.target_backend}:{args.target_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import array
+import bisect
+import hashlib
+import itertools
+import mmap
+import os
+import struct
+
+import scoring
+from storage import atomic_write
+
+# =========================
+# Precomputed outcome table
+# =========================
+# Every complete questionnaire (no unselected categories) is numbered with a
+# mixed-radix code, first category most significant, and the table stores its
+# total and risk level at that position. Scoring a complete form is then one
+# array index; partial forms fall back to scoring.score(). score_cli.py
+# --outcome-table scores through it; the reverse queries below are for
+# questions like "which answer sets reach High Risk" and nothing in the app
+# calls them.
+RADICES = tuple(len(row) - 1 for row in scoring.POINTS)
+SIZE = 1
+for _radix in RADICES:
+    SIZE *= _radix
+
+# File layout: header, SIZE float64 totals, SIZE uint8 risk level codes.
+# The fingerprint covers the scoring tables so a file built for another
+# questionnaire is rebuilt instead of silently used.
+MAGIC = b'RLUT'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sII20s')
+FINGERPRINT = hashlib.sha1(
+    repr((scoring.POINTS, scoring.INTERACTIONS, scoring.RISK_THRESHOLDS)).encode()
+).digest()
+
+
+def encode(indices):
+    code = 0
+    for i, radix in zip(indices, RADICES):
+        if not 0 <= i < radix:
+            raise ValueError(f'option index {i} out of range for radix {radix}')
+        code = code * radix + i
+    return code
+
+
+def decode(code):
+    if not 0 <= code < SIZE:
+        raise ValueError(f'outcome code {code} out of range')
+    indices = []
+    for radix in reversed(RADICES):
+        code, i = divmod(code, radix)
+        indices.append(i)
+    return indices[::-1]
+
+
+class OutcomeTable:
+    def __init__(self, path=None):
+        self.path = path
+        self.totals = None
+        self.levels = None
+        self._mmap = None
+        self._by_total = None
+
+    # Maps the file, building and saving it first if it is missing or stale.
+    def load(self):
+        self._ensure()
+        return self
+
+    def _ensure(self):
+        if self.totals is not None:
+            return
+        if self.path and self._load(self.path):
+            return
+        self._build()
+        if self.path:
+            self.save(self.path)
+
+    def _build(self):
+        totals = array.array('d')
+        levels = bytearray()
+        level_codes = {name: code for code, name in enumerate(scoring.RISK_LEVEL_NAMES)}
+        for indices in itertools.product(*(range(radix) for radix in RADICES)):
+            _, total, level = scoring.score(indices)
+            totals.append(total)
+            levels.append(level_codes[level])
+        self.totals = totals
+        self.levels = levels
+
+    def _load(self, path):
+        # an empty or truncated file cannot be mapped or unpacked; rebuild it
+        if not os.path.exists(path) or os.path.getsize(path) != HEADER.size + SIZE * 9:
+            return False
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, fingerprint = HEADER.unpack_from(mapped, 0)
+        if (magic, version, size, fingerprint) != (MAGIC, FORMAT_VERSION, SIZE, FINGERPRINT):
+            mapped.close()
+            return False
+        view = memoryview(mapped)
+        self._mmap = mapped
+        self.totals = view[HEADER.size:HEADER.size + SIZE * 8].cast('d')
+        self.levels = view[HEADER.size + SIZE * 8:]
+        return True
+
+    def save(self, path):
+        self._ensure()
+
+        def write(f):
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, SIZE, FINGERPRINT))
+            f.write(memoryview(self.totals).cast('B'))
+            f.write(self.levels)
+        atomic_write(path, write, 'wb')
+
+    def close(self):
+        if self._mmap is not None:
+            self.totals.release()
+            self.levels.release()
+            self._mmap.close()
+            self._mmap = None
+        self.totals = self.levels = self._by_total = None
+
+    # Same return value as scoring.score(): (points per category, total, level).
+    def score(self, indices):
+        if scoring.UNSELECTED in indices:
+            return scoring.score(indices)
+        self._ensure()
+        code = encode(indices)
+        points = [row[i] for row, i in zip(scoring.POINTS, indices)]
+        return points, self.totals[code], scoring.RISK_LEVEL_NAMES[self.levels[code]]
+
+    def lookup(self, code):
+        self._ensure()
+        return self.totals[code], scoring.RISK_LEVEL_NAMES[self.levels[code]]
+
+    # =========================
+    # Reverse queries
+    # =========================
+    def codes_at_level(self, level):
+        self._ensure()
+        wanted = scoring.RISK_LEVEL_NAMES.index(level)
+        return [code for code, value in enumerate(self.levels) if value == wanted]
+
+    def _sorted_codes(self):
+        if self._by_total is None:
+            self._ensure()
+            totals = self.totals
+            self._by_total = array.array('I', sorted(range(SIZE), key=totals.__getitem__))
+        return self._by_total
+
+    # codes whose total is strictly above threshold, lowest total first
+    def codes_above(self, threshold):
+        codes = self._sorted_codes()
+        start = bisect.bisect_right(codes, threshold, key=self.totals.__getitem__)
+        return codes[start:].tolist()
+
+    # codes that reach the given risk level or worse
+    def codes_reaching(self, level):
+        rank = scoring.RISK_LEVEL_NAMES.index(level)
+        if rank == 0:
+            return list(range(SIZE))
+        return self.codes_above(scoring.RISK_THRESHOLDS[rank - 1][0])
@@ -0,0 +1,89 @@
+import array
+import collections
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import scoring
+
+# =========================
+# Compact selection codes
+# =========================
+# A form travels to worker processes as one unsigned int: a mixed-radix number
+# with one digit per category, where digit 0 means unselected and digit i + 1
+# means option i. Chunks are shipped as array('I') bytes instead of dicts.
+RADICES = tuple(len(labels) + 1 for labels in scoring.CATEGORY_LABELS.values())
+LEVEL_CODES = {name: code for code, name in enumerate(scoring.RISK_LEVEL_NAMES)}
+
+
+def pack(indices):
+    code = 0
+    for i, radix in zip(indices, RADICES):
+        if not -1 <= i < radix - 1:
+            raise ValueError(f'option index {i} out of range')
+        code = code * radix + i + 1
+    return code
+
+
+def unpack(code):
+    indices = []
+    for radix in reversed(RADICES):
+        code, digit = divmod(code, radix)
+        indices.append(digit - 1)
+    return indices[::-1]
+
+
+# memoized on the code itself so repeated forms skip unpacking as well
+@functools.lru_cache(maxsize=scoring.DEFAULT_CACHE_SIZE * 16)
+def _score_code(code):
+    _, total, level = scoring.score(unpack(code))
+    return total, LEVEL_CODES[level]
+
+
+def _score_codes(payload):
+    totals = array.array('d')
+    levels = bytearray()
+    for code in array.array('I', payload):
+        total, level = _score_code(code)
+        totals.append(total)
+        levels.append(level)
+    return totals.tobytes(), bytes(levels)
+
+
+# =========================
+# Process-pool scoring
+# =========================
+# Yields fn(payload) for each payload, in input order, from a process pool.
+# At most `workers * 2` payloads are in flight, so arbitrarily long inputs
+# stream through. fn must be a module-level function (or a partial of one).
+def ordered_map(fn, payloads, workers=None):
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        for payload in payloads:
+            pending.append(executor.submit(fn, payload))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Yields (total, risk level) per form in input order.
+def score_stream(rows, workers=None, chunk_size=10000):
+    def chunks():
+        codes = array.array('I')
+        for row in rows:
+            codes.append(pack(row))
+            if len(codes) == chunk_size:
+                yield codes.tobytes()
+                codes = array.array('I')
+        if codes:
+            yield codes.tobytes()
+
+    for payload, levels in ordered_map(_score_codes, chunks(), workers):
+        totals = array.array('d', payload)
+        yield from zip(totals.tolist(), (scoring.RISK_LEVEL_NAMES[code] for code in levels))
+
+
+def score_parallel(rows, workers=None, chunk_size=10000):
+    return list(score_stream(rows, workers, chunk_size))
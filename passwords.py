@@ -0,0 +1,109 @@
+import base64
+import hashlib
+import hmac
+import os
+
+# =========================
+# Password hashing
+# =========================
+# Stored hashes are self-describing strings with base64 salt and digest:
+#
+#   pbkdf2_sha256$<iterations>$<salt>$<digest>
+#   scrypt$<n>$<r>$<p>$<salt>$<digest>
+#
+# so the scheme or cost can be changed without locking anyone out: verifying
+# a hash made under another policy succeeds and reports that it should be
+# rehashed. A bare 64-character hex string is an unsalted SHA-256 written by
+# earlier versions and is always due for rehashing.
+#
+# Hashing is deliberately slow (hundreds of ms at the defaults), so the app
+# never calls these on the UI thread. RISKAPP_PASSWORD_SCHEME and
+# RISKAPP_PASSWORD_COST set the policy at import; configure() at runtime.
+SCHEMES = ('pbkdf2_sha256', 'scrypt')
+# pbkdf2_sha256: iterations; scrypt: the CPU/memory cost n (r=8, p=1)
+DEFAULT_COST = {'pbkdf2_sha256': 600_000, 'scrypt': 2 ** 15}
+SALT_BYTES = 16
+DIGEST_BYTES = 32
+SCRYPT_R, SCRYPT_P = 8, 1
+
+current_scheme = None
+current_cost = None
+
+
+def configure(scheme='pbkdf2_sha256', cost=None):
+    global current_scheme, current_cost
+    if scheme not in SCHEMES:
+        raise ValueError(f'Unknown password scheme: {scheme!r}')
+    if scheme == 'scrypt' and not hasattr(hashlib, 'scrypt'):
+        raise ValueError('scrypt needs Python built against OpenSSL 1.1 or later')
+    current_scheme = scheme
+    current_cost = int(cost or DEFAULT_COST[scheme])
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _derive(password, scheme, params, salt):
+    if scheme == 'pbkdf2_sha256':
+        (iterations,) = params
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations, DIGEST_BYTES)
+    n, r, p = params
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + (1 << 20),
+                          dklen=DIGEST_BYTES)
+
+
+def _params(scheme, cost):
+    return (cost,) if scheme == 'pbkdf2_sha256' else (cost, SCRYPT_R, SCRYPT_P)
+
+
+def _encode(scheme, params, salt, digest):
+    return '$'.join([scheme, *map(str, params), _b64(salt), _b64(digest)])
+
+
+def hash_password(password, scheme=None, cost=None):
+    if scheme is None:
+        scheme, cost = current_scheme, cost or current_cost
+    params = _params(scheme, cost or DEFAULT_COST[scheme])
+    salt = os.urandom(SALT_BYTES)
+    return _encode(scheme, params, salt, _derive(password, scheme, params, salt))
+
+
+def is_legacy(stored):
+    return len(stored) == 64 and '$' not in stored
+
+
+# Returns (matches, needs_rehash).
+def verify_password(password, stored):
+    if is_legacy(stored):
+        matches = hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+        return matches, True
+    try:
+        stored_scheme, *fields = stored.split('$')
+        params = tuple(int(field) for field in fields[:-2])
+        salt, digest = base64.b64decode(fields[-2]), base64.b64decode(fields[-1])
+    except (ValueError, IndexError):
+        return False, False
+    if stored_scheme not in SCHEMES or len(params) != len(_params(stored_scheme, 0)):
+        return False, False
+    matches = hmac.compare_digest(_derive(password, stored_scheme, params, salt), digest)
+    return matches, (stored_scheme, params) != (current_scheme, _params(current_scheme, current_cost))
+
+
+# What a login runs off the UI thread: returns (matches, replacement hash or
+# None). The replacement is only computed after a successful match.
+def verify_and_upgrade(password, stored):
+    matches, needs_rehash = verify_password(password, stored)
+    return matches, hash_password(password) if matches and needs_rehash else None
+
+
+# A well-formed hash nothing matches. Checking unknown usernames against it
+# costs the same as a real check, so response time does not reveal which
+# accounts exist.
+def dummy_hash():
+    params = _params(current_scheme, current_cost)
+    return _encode(current_scheme, params, os.urandom(SALT_BYTES), bytes(DIGEST_BYTES))
+
+
+configure(os.environ.get('RISKAPP_PASSWORD_SCHEME', 'pbkdf2_sha256'),
+          os.environ.get('RISKAPP_PASSWORD_COST'))
@@ -0,0 +1,297 @@
+import collections
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# =========================
+# Startup profiler
+# =========================
+# Enabled with `--profile-startup[=report.json]` on the command line or
+# RISKAPP_PROFILE_STARTUP=1 (or =report.json) in the environment. It records
+# how long each startup phase took and writes them as JSON.
+PROFILE_FLAG = '--profile-startup'
+PROFILE_ENV = 'RISKAPP_PROFILE_STARTUP'
+DEFAULT_REPORT = 'startup_profile.json'
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.report_path = DEFAULT_REPORT
+        self.origin = time.perf_counter()
+        self.events = []
+
+    # Must run before kivy is imported: kivy parses sys.argv on import and
+    # rejects options it does not know.
+    def configure(self, argv=None, environ=None):
+        argv = sys.argv if argv is None else argv
+        environ = os.environ if environ is None else environ
+        value = environ.get(PROFILE_ENV)
+        for arg in list(argv[1:]):
+            if arg == PROFILE_FLAG or arg.startswith(PROFILE_FLAG + '='):
+                argv.remove(arg)
+                value = arg.partition('=')[2] or '1'
+        if value and value != '0':
+            self.enabled = True
+            if value != '1':
+                self.report_path = value
+        return self.enabled
+
+    def _now_ms(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = self._now_ms()
+        try:
+            yield
+        finally:
+            self.events.append({'name': name, 'start_ms': round(start, 3), 'duration_ms': round(self._now_ms() - start, 3)})
+
+    def mark(self, name):
+        if self.enabled:
+            self.events.append({'name': name, 'start_ms': round(self._now_ms(), 3), 'duration_ms': 0.0})
+
+    # Times only the first call of obj.method_name, then puts the original back.
+    def time_first_call(self, obj, method_name, name=None):
+        if not self.enabled:
+            return
+        original = getattr(obj, method_name)
+
+        @functools.wraps(original)
+        def first_call(*args, **kwargs):
+            setattr(obj, method_name, original)
+            with self.measure(name or f'first {method_name}'):
+                return original(*args, **kwargs)
+        setattr(obj, method_name, first_call)
+
+    def report(self):
+        return {
+            'python': sys.version.split()[0],
+            'events': sorted(self.events, key=lambda e: e['start_ms']),
+        }
+
+    def dump(self, path=None):
+        if not self.enabled:
+            return
+        with open(path or self.report_path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+startup_profiler = StartupProfiler()
+
+
+# =========================
+# Frame timing
+# =========================
+# Enabled with RISKAPP_FRAME_STATS=1 (or =report.json). Records the time
+# between consecutive frames, split by whether background work (store
+# requests) was outstanding, to show whether I/O ever holds up the main loop.
+#
+# It is also the only frame sampler: the tracer below registers a listener
+# for each frame instead of timing frames itself, and the overlay reads the
+# most recent frames from here.
+FRAME_ENV = 'RISKAPP_FRAME_STATS'
+DEFAULT_FRAME_REPORT = 'frame_stats.json'
+FRAME_BUDGET_MS = 1000 / 60
+RECENT_FRAMES = 240
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else None
+
+
+class FrameStats:
+    def __init__(self):
+        self.enabled = False
+        self.report_path = DEFAULT_FRAME_REPORT
+        self.frames = {'idle': [], 'busy': []}
+        self.recent = collections.deque(maxlen=RECENT_FRAMES)
+        self.listeners = []  # called with each frame's ms
+        self.busy = lambda: False
+        self._was_busy = False
+
+    def configure(self, environ=None):
+        value = (os.environ if environ is None else environ).get(FRAME_ENV)
+        if value and value != '0':
+            self.enabled = True
+            if value != '1':
+                self.report_path = value
+        return self.enabled
+
+    # busy() tells whether background work is in flight right now. Frames are
+    # sampled when the report is enabled or something listens for them.
+    def start(self, clock, busy):
+        if self.enabled or self.listeners:
+            self.busy = busy
+            clock.schedule_interval(self._tick, 0)
+
+    def _tick(self, dt):
+        busy = self.busy()
+        # a frame counts as busy if work was in flight at either end of it
+        self.record(dt * 1000, busy or self._was_busy)
+        self._was_busy = busy
+
+    def record(self, frame_ms, busy):
+        self.frames['busy' if busy else 'idle'].append(frame_ms)
+        self.recent.append(frame_ms)
+        for listener in self.listeners:
+            listener(frame_ms)
+
+    def recent_summary(self):
+        ordered = sorted(self.recent)
+        return {
+            'frame_ms': self.recent[-1] if self.recent else None,
+            'frame_p95_ms': percentile(ordered, 0.95),
+            'frame_max_ms': ordered[-1] if ordered else None,
+        }
+
+    def summary(self):
+        result = {'budget_ms': round(FRAME_BUDGET_MS, 2)}
+        for kind, frames in self.frames.items():
+            ordered = sorted(frames)
+            result[kind] = {
+                'frames': len(ordered),
+                **{f'p{round(p * 100)}_ms': round(percentile(ordered, p), 2) if ordered else None
+                   for p in (0.50, 0.95, 0.99)},
+                'max_ms': round(ordered[-1], 2) if ordered else None,
+                # a little slack for timer jitter at a 60 Hz vsync
+                'over_budget': sum(1 for ms in ordered if ms > FRAME_BUDGET_MS + 1),
+            }
+        return result
+
+    def dump(self, path=None):
+        if not self.enabled:
+            return
+        with open(path or self.report_path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+frame_stats = FrameStats()
+
+
+# =========================
+# Event tracing
+# =========================
+# Enabled with RISKAPP_TRACE=1 (or =trace.json). Records timed callbacks,
+# layout passes, screen switches and the frames sampled by frame_stats as
+# Chrome trace events (load the file in chrome://tracing or ui.perfetto.dev)
+# and keeps running totals for the on-screen overlay.
+TRACE_ENV = 'RISKAPP_TRACE'
+DEFAULT_TRACE = 'trace.json'
+MAX_TRACE_EVENTS = 500_000
+
+
+class Tracer:
+    def __init__(self, frame_stats):
+        self.enabled = False
+        self.trace_path = DEFAULT_TRACE
+        self.origin = time.perf_counter()
+        self.frame_stats = frame_stats
+        self.events = collections.deque(maxlen=MAX_TRACE_EVENTS)
+        self.callbacks = {}  # name -> [calls, total ms, max ms]
+        self.switch = None
+        self.switches = collections.deque(maxlen=50)
+
+    def configure(self, environ=None):
+        value = (os.environ if environ is None else environ).get(TRACE_ENV)
+        if value and value != '0':
+            self.enabled = True
+            if value != '1':
+                self.trace_path = value
+            self.frame_stats.listeners.append(self.frame)
+        return self.enabled
+
+    def _us(self, t):
+        return round((t - self.origin) * 1e6, 1)
+
+    def complete(self, name, start, end, category, args=None):
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': self._us(start),
+                 'dur': round((end - start) * 1e6, 1), 'pid': 1, 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def instant(self, name, category, args=None):
+        self.events.append({'name': name, 'cat': category, 'ph': 'i', 's': 'p', 'ts': self._us(time.perf_counter()),
+                            'pid': 1, 'tid': threading.get_ident(), 'args': args or {}})
+
+    # Returns func wrapped so each call is recorded under name.
+    def wrap(self, func, name=None, category='callback'):
+        name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                self.complete(name, start, end, category)
+                if category == 'callback':
+                    ms = (end - start) * 1000
+                    totals = self.callbacks.setdefault(name, [0, 0.0, 0.0])
+                    totals[0] += 1
+                    totals[1] += ms
+                    totals[2] = max(totals[2], ms)
+                elif category == 'layout' and self.switch is not None:
+                    self.switch['layout_passes'] += 1
+        return traced
+
+    def frame(self, frame_ms):
+        end = time.perf_counter()
+        self.complete('frame', end - frame_ms / 1000, end, 'frame')
+        if self.switch is not None and self.switch.get('settled'):
+            self.end_switch()
+
+    # Layout passes are counted from a screen switch until the first frame
+    # after its transition completes.
+    def begin_switch(self, source, target):
+        if self.switch is not None:
+            self.end_switch()
+        self.switch = {'from': source, 'to': target, 'layout_passes': 0, 'start': time.perf_counter()}
+
+    def switch_settled(self):
+        if self.switch is not None:
+            self.switch['settled'] = True
+
+    def end_switch(self):
+        switch, self.switch = self.switch, None
+        name = f'switch {switch["from"]} -> {switch["to"]}'
+        self.complete(name, switch['start'], time.perf_counter(), 'screen',
+                      {'layout_passes': switch['layout_passes']})
+        self.switches.append({k: switch[k] for k in ('from', 'to', 'layout_passes')})
+
+    def summary(self):
+        return {
+            **self.frame_stats.recent_summary(),
+            'callbacks': {
+                name: {'calls': calls, 'total_ms': round(total, 3), 'max_ms': round(longest, 3)}
+                for name, (calls, total, longest) in sorted(self.callbacks.items())
+            },
+            'switches': list(self.switches),
+        }
+
+    def chrome_trace(self):
+        return {
+            'traceEvents': list(self.events),
+            'displayTimeUnit': 'ms',
+            'otherData': {'python': sys.version.split()[0], 'summary': self.summary(),
+                          'frames': self.frame_stats.summary()},
+        }
+
+    def dump(self, path=None):
+        if not self.enabled:
+            return
+        with open(path or self.trace_path, 'w') as f:
+            json.dump(self.chrome_trace(), f, separators=(',', ':'))
+
+
+tracer = Tracer(frame_stats)
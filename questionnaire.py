@@ -0,0 +1,222 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+
+# =========================
+# Questionnaire schema
+# =========================
+# The questions, their options and points, the interaction terms and the risk
+# thresholds live in versioned files, schema/questionnaire_v<N>.json, and the
+# highest version is the one new forms are scored with. Older versions stay on
+# disk so a saved report can be re-scored under the schema it was made with.
+#
+# A schema file is parsed and validated once, compiled into the index tables
+# the scoring engine uses, and pickled to schema/__pycache__ keyed on the
+# source's hash; later starts load the pickle and skip both steps.
+# RISKAPP_SCHEMA_DIR points the app at another schema directory.
+SCHEMA_DIR = os.environ.get(
+    'RISKAPP_SCHEMA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema')
+)
+SCHEMA_PREFIX = 'questionnaire_v'
+COMPILER_VERSION = 1
+
+# Selections are option indices in category order, with -1 for a category
+# left unselected.
+UNSELECTED = -1
+
+
+class SchemaError(ValueError):
+    pass
+
+
+class CompiledSchema:
+    def __init__(self, version, categories, interactions, risk_thresholds, highest_risk):
+        # categories: {name: [(option, points)]}
+        # interactions: [(coefficient, category a, category b, complement)]; the
+        # term is coefficient * a * b, or coefficient * a * (complement - b)
+        # risk_thresholds: [(bound, level)]; totals up to and including a bound
+        # get its level, anything above the last one gets highest_risk
+        self.version = version
+        self.categories = categories
+        self.interactions = interactions
+        self.risk_thresholds = risk_thresholds
+        self.highest_risk = highest_risk
+        self.risk_level_names = tuple(level for _, level in risk_thresholds) + (highest_risk,)
+
+        # the spinner label is "<name>: <points> points"
+        self.category_names = tuple(categories)
+        self.category_labels = {
+            category: [f'{name}: {points} points' for name, points in options]
+            for category, options in categories.items()
+        }
+        self.label_index = {
+            category: {label: i for i, label in enumerate(labels)}
+            for category, labels in self.category_labels.items()
+        }
+        # every points row carries a trailing 0 so that index -1 scores
+        # nothing without a branch
+        self.points = tuple(
+            tuple(points for _, points in options) + (0,)
+            for options in categories.values()
+        )
+        self.compiled_interactions = tuple(self._compile_interaction(*term) for term in interactions)
+
+    def _compile_interaction(self, coefficient, a, b, complement):
+        ia, ib = self.category_names.index(a), self.category_names.index(b)
+        products = tuple(
+            tuple(pa * (pb if complement is None else complement - pb) for pb in self.points[ib])
+            for pa in self.points[ia]
+        )
+        return coefficient, ia, ib, products
+
+    def risk_level(self, total):
+        for bound, level in self.risk_thresholds:
+            if total <= bound:
+                return level
+        return self.highest_risk
+
+    # Returns (points per category, total, risk level). The float operations run
+    # in the same order as the original formula so totals match it exactly.
+    def score(self, indices):
+        points = [row[i] for row, i in zip(self.points, indices)]
+        total = sum(points)
+        for coefficient, ia, ib, products in self.compiled_interactions:
+            total = total + coefficient * products[indices[ia]][indices[ib]]
+        total = round(total, 2)
+        return points, total, self.risk_level(total)
+
+
+# =========================
+# Validation
+# =========================
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _parse(doc, version):
+    if not isinstance(doc, dict):
+        raise SchemaError('schema must be a JSON object')
+    if doc.get('version') != version:
+        raise SchemaError(f'version field is {doc.get("version")!r}, expected {version}')
+
+    categories = {}
+    for category in doc.get('categories') or ():
+        name = category.get('name') if isinstance(category, dict) else None
+        if not isinstance(name, str) or not name:
+            raise SchemaError(f'category without a name: {category!r}')
+        if name in categories:
+            raise SchemaError(f'duplicate category {name!r}')
+        options = []
+        for option in category.get('options') or ():
+            if not isinstance(option, dict) or not isinstance(option.get('label'), str) \
+                    or not _is_int(option.get('points')):
+                raise SchemaError(f'{name}: options need a string label and integer points: {option!r}')
+            if option['label'] in (label for label, _ in options):
+                raise SchemaError(f'{name}: duplicate option {option["label"]!r}')
+            options.append((option['label'], option['points']))
+        if not options:
+            raise SchemaError(f'{name}: no options')
+        categories[name] = options
+    if not categories:
+        raise SchemaError('no categories')
+
+    interactions = []
+    for term in doc.get('interactions', ()):
+        if not isinstance(term, dict) or not _is_number(term.get('coefficient')):
+            raise SchemaError(f'interaction needs a numeric coefficient: {term!r}')
+        a, b, complement = term.get('a'), term.get('b'), term.get('complement')
+        if a not in categories or b not in categories or a == b:
+            raise SchemaError(f'interaction must name two different categories: {term!r}')
+        if complement is not None and not _is_int(complement):
+            raise SchemaError(f'interaction complement must be an integer: {term!r}')
+        interactions.append((term['coefficient'], a, b, complement))
+
+    levels = doc.get('risk_levels') or ()
+    if not levels or not all(isinstance(level, dict) and isinstance(level.get('label'), str) for level in levels):
+        raise SchemaError('risk_levels must be a list of objects with a label')
+    risk_thresholds = []
+    for level in levels[:-1]:
+        bound = level.get('max_total')
+        if not _is_number(bound) or (risk_thresholds and bound <= risk_thresholds[-1][0]):
+            raise SchemaError(f'{level["label"]}: max_total must be a number above the previous level\'s')
+        risk_thresholds.append((bound, level['label']))
+    if 'max_total' in levels[-1]:
+        raise SchemaError(f'{levels[-1]["label"]}: the last risk level is open-ended and takes no max_total')
+    names = [level['label'] for level in levels]
+    if len(set(names)) != len(names):
+        raise SchemaError('duplicate risk level labels')
+
+    return CompiledSchema(version, categories, interactions, risk_thresholds, levels[-1]['label'])
+
+
+# =========================
+# Loading
+# =========================
+def schema_path(version):
+    return os.path.join(SCHEMA_DIR, f'{SCHEMA_PREFIX}{version}.json')
+
+
+def available_versions():
+    versions = []
+    for name in os.listdir(SCHEMA_DIR):
+        stem, ext = os.path.splitext(name)
+        if ext == '.json' and stem.startswith(SCHEMA_PREFIX) and stem[len(SCHEMA_PREFIX):].isdigit():
+            versions.append(int(stem[len(SCHEMA_PREFIX):]))
+    return sorted(versions)
+
+
+def compile_schema(version):
+    path = schema_path(version)
+    try:
+        with open(path, 'rb') as f:
+            source = f.read()
+    except FileNotFoundError:
+        raise SchemaError(f'no questionnaire schema version {version} ({path})')
+    digest = hashlib.sha256(source).hexdigest()
+    cache_path = os.path.join(SCHEMA_DIR, '__pycache__', f'{SCHEMA_PREFIX}{version}.pickle')
+
+    try:
+        with open(cache_path, 'rb') as f:
+            compiler, cached_digest, schema = pickle.load(f)
+        if (compiler, cached_digest) == (COMPILER_VERSION, digest):
+            return schema
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        pass
+
+    try:
+        doc = json.loads(source)
+    except ValueError as e:
+        raise SchemaError(f'{path}: {e}')
+    try:
+        schema = _parse(doc, version)
+    except SchemaError as e:
+        raise SchemaError(f'{path}: {e}')
+
+    # the cache is only an optimization; a read-only install just recompiles
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((COMPILER_VERSION, digest, schema), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return schema
+
+
+# One compiled schema per version per process; load_schema() with no version
+# returns the newest.
+@functools.lru_cache(maxsize=None)
+def load_schema(version=None):
+    if version is None:
+        versions = available_versions()
+        if not versions:
+            raise SchemaError(f'no questionnaire schema in {SCHEMA_DIR}')
+        return load_schema(versions[-1])
+    return compile_schema(version)
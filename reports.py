@@ -0,0 +1,92 @@
+import time
+from dataclasses import dataclass
+
+import questionnaire
+
+# =========================
+# Report records
+# =========================
+# On-disk encoding: a flat JSON list tagged with a format number,
+#   [2, timestamp, [option index per category], [points per category], total,
+#    risk level index, schema version]
+# where an option index of -1 means the category was left unselected and the
+# indices refer to the questionnaire schema of that version. Format 1 records
+# have no schema version; they were all made with schema 1.
+RECORD_FORMAT = 2
+
+
+@dataclass(frozen=True, slots=True)
+class Report:
+    timestamp: int
+    selections: tuple
+    scores: tuple
+    total: float
+    risk_level: str
+    schema_version: int = 1
+
+    @classmethod
+    def create(cls, selections, scores, total, risk_level, schema_version, timestamp=None):
+        return cls(
+            int(time.time() if timestamp is None else timestamp),
+            tuple(selections),
+            tuple(scores),
+            total,
+            risk_level,
+            schema_version,
+        )
+
+    def encode(self):
+        return [
+            RECORD_FORMAT,
+            self.timestamp,
+            list(self.selections),
+            list(self.scores),
+            self.total,
+            self.schema().risk_level_names.index(self.risk_level),
+            self.schema_version,
+        ]
+
+    @classmethod
+    def decode(cls, record):
+        fmt = record[0]
+        if fmt == 1:
+            _, timestamp, selections, scores, total, level = record
+            version = 1
+        elif fmt == RECORD_FORMAT:
+            _, timestamp, selections, scores, total, level, version = record
+        else:
+            raise ValueError(f'Unknown report record format: {fmt!r}')
+        level_names = questionnaire.load_schema(version).risk_level_names
+        return cls(timestamp, tuple(selections), tuple(scores), total, level_names[level], version)
+
+    def schema(self):
+        return questionnaire.load_schema(self.schema_version)
+
+    # Scores the saved answers again under the schema they were given against,
+    # returning (points per category, total, risk level) like scoring.score().
+    def rescore(self):
+        return self.schema().score(self.selections)
+
+    def result_text(self):
+        return f'Estimated Risk Score: {self.total} ({self.risk_level})'
+
+    def format(self):
+        when = time.strftime('%Y-%m-%d %H:%M', time.localtime(self.timestamp))
+        return f'{when}  {self.result_text()}'
+
+
+# Reports saved before structured records existed are plain display strings;
+# they are passed through untouched.
+def decode_report(value):
+    if isinstance(value, str):
+        return value
+    return Report.decode(value)
+
+
+def format_report(value):
+    report = decode_report(value)
+    return report if isinstance(report, str) else report.format()
+
+
+def score_history(values):
+    return [(r.timestamp, r.total) for r in map(decode_report, values) if isinstance(r, Report)]
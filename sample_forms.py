@@ -0,0 +1,35 @@
+import random
+
+import scoring
+
+# =========================
+# Sample questionnaires
+# =========================
+# Random answer sets shared by the benchmarks and tests. A form is a list of
+# option indices in category order, with UNSELECTED (-1) for a category left
+# blank; complete=True never leaves one blank.
+
+
+def random_indices(rng, complete=False):
+    low = 0 if complete else scoring.UNSELECTED
+    return [rng.randrange(low, len(labels)) for labels in scoring.CATEGORY_LABELS.values()]
+
+
+def random_forms(count, seed=0, complete=False):
+    rng = random.Random(seed)
+    return [random_indices(rng, complete) for _ in range(count)]
+
+
+# The form as the app's spinners hand it to calculate_fake_risk: each
+# category's option label, or the spinner placeholder when unselected.
+def labelled(indices):
+    return {
+        category: labels[i] if i >= 0 else 'Select Option'
+        for (category, labels), i in zip(scoring.CATEGORY_LABELS.items(), indices)
+    }
+
+
+# The form as score_cli.py and score_server.py take it: option indices by
+# category name.
+def named(indices):
+    return dict(zip(scoring.CATEGORY_NAMES, indices))
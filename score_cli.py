@@ -0,0 +1,266 @@
+import argparse
+import csv
+import functools
+import io
+import json
+import os
+import re
+import sys
+
+import parallel_scoring
+import scoring
+from outcome_table import OutcomeTable
+
+# =========================
+# Headless batch scorer
+# =========================
+# Streams questionnaires from CSV or JSONL (a file or stdin) and writes one
+# result per input record, in input order, without loading the whole input:
+#
+#   python score_cli.py forms.csv --workers 8 > scores.csv
+#   cat forms.jsonl | python score_cli.py --format jsonl
+#
+# Each record has one field per category named as in the app. A value is the
+# option's label, its 0-based option index, or empty for unselected; labels
+# the app does not know are treated as unselected, as calculate_fake_risk does.
+#
+# With --outcome-table PATH, complete forms are looked up in the precomputed
+# table at PATH (built on first use, then memory-mapped and shared by the
+# workers) instead of being scored.
+#
+# A record that cannot be read or scored (malformed JSON, an option index out
+# of range) stops the run with its line number; with --on-error skip it is
+# reported on stderr and left out of the results instead.
+FORMATS = ('csv', 'jsonl')
+ON_ERROR = ('fail', 'skip')
+MISSING = object()
+INDEX_PATTERN = re.compile(r'-?\d+')
+
+
+class RecordError(ValueError):
+    pass
+
+
+def record_indices(record):
+    indices = []
+    for category in scoring.CATEGORY_NAMES:
+        value = record.get(category)
+        if isinstance(value, str) and INDEX_PATTERN.fullmatch(value.strip()):
+            value = int(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            if not scoring.UNSELECTED <= value < len(scoring.CATEGORY_LABELS[category]):
+                raise ValueError(f'{category}: option index {value} out of range')
+            indices.append(value)
+        elif isinstance(value, str):
+            indices.append(scoring.LABEL_INDEX[category].get(value, scoring.UNSELECTED))
+        else:
+            indices.append(scoring.UNSELECTED)
+    return indices
+
+
+def make_result(record_id, total, level, id_field):
+    result = {'total': total, 'risk_level': level}
+    if record_id is not MISSING:
+        result = {id_field: record_id, **result}
+    return result
+
+
+# Yields (line number, record). A JSONL line that does not parse to an object
+# comes back as its ValueError in place of the record. A chunk of a CSV file
+# passes the header's fieldnames and the line number of its first line.
+def read_records(stream, fmt, fieldnames=None, first_line=1):
+    if fmt == 'csv':
+        reader = csv.DictReader(stream, fieldnames)
+        for record in reader:
+            yield first_line - 1 + reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, first_line):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError('expected a JSON object')
+        except ValueError as e:
+            record = e
+        yield line_number, record
+
+
+# Yields (record id, option indices) for each record that can be scored.
+def parse_records(numbered, id_field='id', on_error='fail', errors=None):
+    for line_number, record in numbered:
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            indices = record_indices(record)
+        except ValueError as e:
+            if on_error == 'fail':
+                raise RecordError(f'line {line_number}: {e}') from e
+            (errors or sys.stderr).write(f'skipped line {line_number}: {e}\n')
+            continue
+        yield record.get(id_field, MISSING), indices
+
+
+def score_stream(parsed, id_field='id', table=None):
+    score = scoring.cached_score if table is None else table.score
+    for record_id, indices in parsed:
+        _, total, level = score(indices)
+        yield make_result(record_id, total, level, id_field)
+
+
+# CSV output always has the id column, left empty for records without an id.
+# The header goes out with the first row; workers format rows without it.
+class ResultWriter:
+    def __init__(self, stream, fmt, id_field='id', header=True):
+        self.stream = stream
+        self.fmt = fmt
+        self.fieldnames = [id_field, 'total', 'risk_level']
+        self.header = header
+        self.csv_writer = None
+
+    def _csv(self):
+        if self.csv_writer is None:
+            self.csv_writer = csv.DictWriter(self.stream, fieldnames=self.fieldnames, restval='', lineterminator='\n')
+            if self.header:
+                self.csv_writer.writeheader()
+        return self.csv_writer
+
+    def write(self, result):
+        if self.fmt == 'jsonl':
+            self.stream.write(json.dumps(result, separators=(',', ':')) + '\n')
+            return
+        self._csv().writerow(result)
+
+    # rows already formatted by a worker
+    def write_formatted(self, text):
+        if text and self.fmt == 'csv':
+            self._csv()
+        self.stream.write(text)
+
+
+# =========================
+# Worker processes
+# =========================
+# With several workers the parent only cuts the input into chunks of whole
+# records; each worker parses, scores and formats its chunk and sends back the
+# output text, which the parent writes in input order. A CSV record ends at a
+# line break outside quotes, i.e. where the lines so far hold an even number
+# of quote characters.
+def read_chunks(lines, fmt, chunk_size, first_line=1):
+    chunk, quotes = [], 0
+    for line_number, line in enumerate(lines, first_line):
+        chunk.append(line)
+        if fmt == 'csv':
+            quotes += line.count('"')
+            if quotes % 2:
+                continue
+        if len(chunk) >= chunk_size:
+            yield first_line, chunk
+            chunk, first_line = [], line_number + 1
+    if chunk:
+        yield first_line, chunk
+
+
+# Returns (output text, skip messages, RecordError or None). With
+# on_error='fail' the text stops at the first bad record, as it does in process.
+def _score_chunk(fmt, fieldnames, id_field, on_error, out_fmt, table_path, chunk):
+    first_line, lines = chunk
+    out, errors = io.StringIO(), io.StringIO()
+    writer = ResultWriter(out, out_fmt, id_field, header=False)
+    parsed = parse_records(read_records(lines, fmt, fieldnames, first_line), id_field, on_error, errors)
+    try:
+        for result in score_stream(parsed, id_field, _worker_table(table_path)):
+            writer.write(result)
+    except RecordError as e:
+        return out.getvalue(), errors.getvalue(), e
+    return out.getvalue(), errors.getvalue(), None
+
+
+# each worker maps the table once and keeps it for all its chunks
+_worker_tables = {}
+
+
+def _worker_table(path):
+    if path is None:
+        return None
+    if path not in _worker_tables:
+        _worker_tables[path] = OutcomeTable(path).load()
+    return _worker_tables[path]
+
+
+# Yields (output text, skip messages) per chunk, in input order, and raises
+# RecordError after the output that preceded the bad record. table_path must
+# name an outcome table file that is already built.
+def score_in_workers(stream, fmt, out_fmt, id_field='id', on_error='fail', workers=2, chunk_size=1000,
+                     table_path=None):
+    lines = iter(stream)
+    fieldnames, first_line = None, 1
+    if fmt == 'csv':
+        header = next(read_chunks(lines, fmt, 1), None)
+        if header is None:
+            return
+        fieldnames = next(csv.reader(header[1]))
+        first_line = len(header[1]) + 1
+    work = functools.partial(_score_chunk, fmt, fieldnames, id_field, on_error, out_fmt, table_path)
+    for text, skipped, error in parallel_scoring.ordered_map(work, read_chunks(lines, fmt, chunk_size, first_line),
+                                                             workers):
+        yield text, skipped
+        if error is not None:
+            raise error
+
+
+def guess_format(path):
+    ext = os.path.splitext(path or '')[1].lower().lstrip('.')
+    return {'csv': 'csv', 'jsonl': 'jsonl', 'ndjson': 'jsonl'}.get(ext)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score questionnaires from CSV or JSONL without the GUI.')
+    parser.add_argument('input', nargs='?', help='input file (default: stdin)')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('--format', choices=FORMATS, help='input format (default: from the file extension)')
+    parser.add_argument('--output-format', choices=FORMATS, help='output format (default: same as input)')
+    parser.add_argument('--id-field', default='id', help='input field copied to each result (default: id)')
+    # a pool of one only adds process overhead, so 1 scores in this process
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes; only worth it with several CPUs (default: 1, no pool)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='input lines per worker task')
+    parser.add_argument('--on-error', choices=ON_ERROR, default='fail',
+                        help='on a bad record, stop with its line number or skip it (default: fail)')
+    parser.add_argument('--outcome-table', metavar='PATH',
+                        help='look complete forms up in the outcome table at PATH, building it if needed')
+    args = parser.parse_args(argv)
+
+    fmt = args.format or guess_format(args.input)
+    if fmt is None:
+        parser.error('cannot tell the input format; pass --format csv or --format jsonl')
+    out_fmt = args.output_format or fmt
+
+    # built here so the workers only ever map a finished file
+    table = OutcomeTable(args.outcome_table).load() if args.outcome_table else None
+    source = open(args.input, newline='') if args.input else sys.stdin
+    sink = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        writer = ResultWriter(sink, out_fmt, args.id_field)
+        if args.workers > 1:
+            for text, skipped in score_in_workers(source, fmt, out_fmt, args.id_field, args.on_error,
+                                                  args.workers, args.chunk_size, args.outcome_table):
+                sys.stderr.write(skipped)
+                writer.write_formatted(text)
+        else:
+            parsed = parse_records(read_records(source, fmt), args.id_field, args.on_error)
+            for result in score_stream(parsed, args.id_field, table):
+                writer.write(result)
+    except RecordError as e:
+        sys.exit(f'{parser.prog}: {e}')
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            sink.close()
+        if table is not None:
+            table.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import scoring
+from reports import Report
+from score_cli import record_indices
+from storage import BACKENDS, open_store
+
+# =========================
+# HTTP scoring service
+# =========================
+# A small asyncio HTTP/1.1 server with keep-alive:
+#
+#   GET  /health
+#   POST /score        {"selections": {...}, "username": "optional"}
+#   POST /score/batch  {"forms": [{...}, ...], "username": "optional"}
+#
+# Selections use the same field names and values as score_cli.py. When a
+# username is given and the server has a store, the report is appended to that
+# user's history on a dedicated store thread so the event loop never blocks on
+# disk I/O. Binds to localhost by default: there is no authentication.
+MAX_BODY = 8 * 1024 * 1024
+MAX_BATCH = 10000
+IDLE_TIMEOUT = 30
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ScoringServer:
+    def __init__(self, store_backend=None, store_path=None, max_concurrency=64):
+        self.limit = asyncio.Semaphore(max_concurrency)
+        self.store = None
+        self.store_executor = None
+        if store_backend:
+            # stores are not thread-safe (sqlite connections are tied to their
+            # thread), so one thread owns the store and serializes all writes
+            self.store_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='store')
+            self.store = self.store_executor.submit(open_store, store_backend, store_path).result()
+            self.store.start_compactor()
+
+    def close(self):
+        if self.store_executor is not None:
+            self.store_executor.submit(self.store.close).result()
+            self.store_executor.shutdown()
+
+    async def save_reports(self, username, reports):
+        if self.store is None or not username:
+            return False
+
+        def append_all():
+            return all([self.store.append_report(username, report.encode()) for report in reports])
+        return await asyncio.get_running_loop().run_in_executor(self.store_executor, append_all)
+
+    def score_form(self, form):
+        if not isinstance(form, dict):
+            raise HttpError(400, 'each form must be a JSON object')
+        try:
+            indices = record_indices(form)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        points, total, level = scoring.cached_score(indices)
+        return Report.create(indices, points, total, level, scoring.SCHEMA_VERSION)
+
+    async def dispatch(self, method, path, body):
+        if path == '/health':
+            if method != 'GET':
+                raise HttpError(405, 'use GET')
+            return {'status': 'ok'}
+        if path not in ('/score', '/score/batch'):
+            raise HttpError(404, f'no such endpoint: {path}')
+        if method != 'POST':
+            raise HttpError(405, 'use POST')
+        try:
+            request = json.loads(body)
+        except ValueError:
+            raise HttpError(400, 'body must be JSON')
+        if not isinstance(request, dict):
+            raise HttpError(400, 'body must be a JSON object')
+
+        if path == '/score':
+            reports = [self.score_form(request.get('selections', {}))]
+        else:
+            forms = request.get('forms')
+            if not isinstance(forms, list):
+                raise HttpError(400, '"forms" must be a list')
+            if len(forms) > MAX_BATCH:
+                raise HttpError(413, f'at most {MAX_BATCH} forms per batch')
+            reports = [self.score_form(form) for form in forms]
+
+        stored = await self.save_reports(request.get('username'), reports)
+        results = [{'total': r.total, 'risk_level': r.risk_level} for r in reports]
+        if path == '/score':
+            return {**results[0], 'stored': stored}
+        return {'results': results, 'stored': stored}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                keep_alive = await self.handle_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, request_line, reader, writer):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+            length = int(headers.get('content-length', 0))
+            if length < 0:
+                raise ValueError('negative Content-Length')
+        except ValueError:
+            self.respond(writer, 400, {'error': 'malformed request'}, keep_alive=False)
+            return False
+        if length > MAX_BODY:
+            self.respond(writer, 413, {'error': 'request body too large'}, keep_alive=False)
+            return False
+        body = await reader.readexactly(length) if length else b''
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        async with self.limit:
+            try:
+                status, payload = 200, await self.dispatch(method, target.split('?', 1)[0], body)
+            except HttpError as e:
+                status, payload = e.status, {'error': str(e)}
+            except Exception as e:
+                status, payload = 500, {'error': f'{type(e).__name__}: {e}'}
+        self.respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        head = (
+            f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+        )
+        writer.write(head.encode('latin-1') + body)
+
+
+async def serve(host, port, store_backend=None, store_path=None, max_concurrency=64):
+    server = ScoringServer(store_backend, store_path, max_concurrency)
+    listener = await asyncio.start_server(server.handle_connection, host, port, backlog=1024)
+    address = listener.sockets[0].getsockname()
+    print(f'Scoring service listening on http://{address[0]}:{address[1]}', flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP risk scoring service.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-concurrency', type=int, default=64, help='requests handled at once')
+    parser.add_argument('--store', choices=sorted(BACKENDS), help='store reports for requests that name a user')
+    parser.add_argument('--store-path', help="store location (default: the backend's own)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.store, args.store_path, args.max_concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
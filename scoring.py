@@ -0,0 +1,121 @@
+import functools
+import os
+
+import questionnaire
+
+# =========================
+# Questionnaire tables
+# =========================
+# Compiled from the newest schema/questionnaire_v<N>.json; see questionnaire.py
+# for the file format and the table layout.
+SCHEMA = questionnaire.load_schema()
+SCHEMA_VERSION = SCHEMA.version
+
+CATEGORIES = SCHEMA.categories
+INTERACTIONS = SCHEMA.interactions
+RISK_THRESHOLDS = SCHEMA.risk_thresholds
+HIGHEST_RISK = SCHEMA.highest_risk
+RISK_LEVEL_NAMES = SCHEMA.risk_level_names
+
+UNSELECTED = questionnaire.UNSELECTED
+CATEGORY_NAMES = SCHEMA.category_names
+CATEGORY_LABELS = SCHEMA.category_labels
+LABEL_INDEX = SCHEMA.label_index
+POINTS = SCHEMA.points
+COMPILED_INTERACTIONS = SCHEMA.compiled_interactions
+
+# =========================
+# Scoring
+# =========================
+risk_level = SCHEMA.risk_level
+score = SCHEMA.score
+
+# =========================
+# Incremental scoring
+# =========================
+# Running score for a form being filled in one answer at a time. Changing a
+# category replaces its base points and recomputes only the interaction terms
+# that involve it; the cached terms are then added in the same order as in
+# score(), so the result is identical to re-scoring the whole form.
+TERMS_BY_CATEGORY = tuple(
+    tuple(t for t, (_, ia, ib, _) in enumerate(COMPILED_INTERACTIONS) if c in (ia, ib))
+    for c in range(len(CATEGORY_NAMES))
+)
+
+
+class RunningScore:
+    def __init__(self):
+        self.indices = [UNSELECTED] * len(CATEGORY_NAMES)
+        self.base = 0
+        self.terms = [
+            coefficient * products[UNSELECTED][UNSELECTED]
+            for coefficient, _, _, products in COMPILED_INTERACTIONS
+        ]
+
+    # Returns False when the category already had that answer.
+    def select(self, category, index):
+        indices = self.indices
+        old = indices[category]
+        if old == index:
+            return False
+        row = POINTS[category]
+        self.base += row[index] - row[old]
+        indices[category] = index
+        for t in TERMS_BY_CATEGORY[category]:
+            coefficient, ia, ib, products = COMPILED_INTERACTIONS[t]
+            self.terms[t] = coefficient * products[indices[ia]][indices[ib]]
+        return True
+
+    def result(self):
+        total = self.base
+        for term in self.terms:
+            total = total + term
+        total = round(total, 2)
+        return total, risk_level(total)
+
+
+# =========================
+# Memoized scoring
+# =========================
+# Identical answer sets are common, so scores are kept in a bounded LRU cache
+# keyed by the tuple of option indices. RISKAPP_SCORE_CACHE_SIZE sets the size
+# at import; configure_cache() changes it (and clears the cache) at runtime.
+DEFAULT_CACHE_SIZE = 4096
+
+
+def _score_key(key):
+    points, total, level = score(key)
+    return tuple(points), total, level
+
+
+def configure_cache(maxsize=DEFAULT_CACHE_SIZE):
+    global _cached_score
+    _cached_score = functools.lru_cache(maxsize=maxsize)(_score_key)
+
+
+def cached_score(indices):
+    return _cached_score(tuple(indices))
+
+
+def cache_info():
+    return _cached_score.cache_info()
+
+
+configure_cache(int(os.environ.get('RISKAPP_SCORE_CACHE_SIZE', DEFAULT_CACHE_SIZE)))
+
+
+def selection_indices(selections):
+    return [
+        LABEL_INDEX[category].get(selections.get(category), UNSELECTED)
+        for category in CATEGORY_NAMES
+    ]
+
+
+def format_score(total, level):
+    return f'{total} ({level})'
+
+
+# Label-based entry point kept for callers holding spinner texts.
+def calculate_fake_risk(selections):
+    _, total, level = cached_score(selection_indices(selections))
+    return format_score(total, level)
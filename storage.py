@@ -0,0 +1,940 @@
+import contextlib
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+
+# =========================
+# Store interface
+# =========================
+# Every backend exposes the same per-user operations so screens never have to
+# load or rewrite the whole user base to change one account.
+class UserStore:
+    def get_user(self, username):
+        raise NotImplementedError
+
+    def create_user(self, username, password_hash):
+        raise NotImplementedError
+
+    def update_user(self, username, **fields):
+        raise NotImplementedError
+
+    # Replaces the whole account record. Existing reports are kept unless the
+    # record carries its own 'reports' list.
+    def put_user(self, username, user):
+        raise NotImplementedError
+
+    def delete_user(self, username):
+        raise NotImplementedError
+
+    def append_report(self, username, report):
+        raise NotImplementedError
+
+    # Reports come back oldest first; offset/limit select one page of them.
+    def get_reports(self, username, offset=0, limit=None):
+        raise NotImplementedError
+
+    def count_reports(self, username):
+        return len(self.get_reports(username))
+
+    def clear_reports(self, username):
+        raise NotImplementedError
+
+    def load_all(self):
+        raise NotImplementedError
+
+    def import_users(self, users):
+        for username, user in users.items():
+            self.put_user(username, user)
+
+    def compact(self):
+        pass
+
+    def start_compactor(self, interval=30.0):
+        pass
+
+    def close(self):
+        pass
+
+
+# =========================
+# Atomic file writes
+# =========================
+# Write to a temp file in the same directory, fsync it, then rename it over the
+# target so readers only ever see the old or the new document, never half of one.
+def atomic_write_json(path, data):
+    atomic_write(path, lambda f: json.dump(data, f, separators=(',', ':')))
+
+
+# write(f) fills the temp file; mode='wb' opens it for bytes.
+def atomic_write(path, write, mode='w'):
+    tmp_path = write_temp(path, write, mode)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        discard_temp(tmp_path)
+        raise
+    fsync_directory(path)
+
+
+# The first half of atomic_write: returns the synced temp file, for callers
+# that decide later whether to rename it into place.
+def write_temp(path, write, mode='w'):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        discard_temp(tmp_path)
+        raise
+    return tmp_path
+
+
+def discard_temp(tmp_path):
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def fsync_directory(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+# =========================
+# Cross-process file locks
+# =========================
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextlib.contextmanager
+def file_lock(path, exclusive=True):
+    with open(path, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            # msvcrt has no shared locks; LK_LOCK gives up after ~10s so keep trying
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield f
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class StoreConflictError(Exception):
+    pass
+
+
+def _file_stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+# Stores user as the account record for username. Existing reports are kept
+# unless user carries its own 'reports' list.
+def _put_record(users, username, user):
+    record = copy.deepcopy(user)
+    if 'reports' not in record:
+        record['reports'] = users.get(username, {}).get('reports', [])
+    users[username] = record
+    return True
+
+
+# index is the credentials index describing data, or None to parse it whole.
+def _parse_users(data, index):
+    if index is None:
+        return json.loads(data)
+    return {username: json.loads(data[offset:offset + length])
+            for username, (_, offset, length) in index.items()}
+
+
+# =========================
+# JSON backend (users.json)
+# =========================
+# Reports are not written into users.json directly: each submission is appended
+# as one line to a journal next to it, and a background compactor folds the
+# journal into the main document (see compact). Any other mutation folds it in
+# as well.
+#
+# The parsed users dict is cached in memory and only re-read when the mtime or
+# size of users.json or its journal changes; writes go through the cache.
+# With coalesce_window > 0, saves within that many seconds of the first pending
+# one are flushed together as a single write.
+#
+# Every write of users.json also writes users.json.index: each account's
+# fields without its reports, plus the byte offset and length of its record in
+# users.json. Logins read only the index and a user's reports are read from
+# their own slice of users.json (plus the journal), so neither depends on how
+# many reports are stored overall. The whole document is only held while a
+# mutation or a pending coalesced write needs it; once it is written the cache
+# is released and the store goes back to the index.
+# Full loads use the offsets to parse one record at a time. The
+# index records the size and mtime of the users.json it describes; when they
+# do not match (an interrupted write, or a file from an older version), the
+# store falls back to parsing users.json and the compactor rebuilds the index.
+#
+# Several app instances may share one users.json. Every write happens under an
+# exclusive flock on users.json.lock, which also holds a version counter bumped
+# on each write. A mutation prepared against a cached copy whose version is no
+# longer current is retried on fresh data instead of overwriting the newer file.
+# Coalescing defers writes outside the lock, so only use it for a single instance.
+class JsonUserStore(UserStore):
+    def __init__(self, path='users.json', journal=True, compact_after=500, coalesce_window=0,
+                 max_retries=10):
+        self.path = path
+        self.journal_path = path + '.journal' if journal else None
+        self.index_path = path + '.index'
+        self.lock_path = path + '.lock'
+        self.compact_after = compact_after
+        self.journal_entries = 0
+        self.max_retries = max_retries
+        self.lock = threading.RLock()
+        self._compactor = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._cache = None
+        self._cache_key = None
+        self._index = None
+        self._index_key = None
+        self._reports_cache = None
+        self.stats = {'hits': 0, 'misses': 0, 'reloads': 0, 'conflicts': 0}
+        self.coalesce_window = coalesce_window
+        self._dirty = False
+        self._flush_timer = None
+
+    def _stat_key(self):
+        return tuple(_file_stat(path) for path in [self.path] + self._journals())
+
+    # Rotated journals (users.json.journal.N) oldest first, then the live one.
+    def _journals(self):
+        if not self.journal_path:
+            return []
+        prefix = os.path.basename(self.journal_path) + '.'
+        numbers = sorted(int(name[len(prefix):])
+                         for name in os.listdir(os.path.dirname(os.path.abspath(self.journal_path)))
+                         if name.startswith(prefix) and name[len(prefix):].isdigit())
+        return [f'{self.journal_path}.{number}' for number in numbers] + [self.journal_path]
+
+    def _read_version(self, lock_file):
+        lock_file.seek(0)
+        data = lock_file.read().strip()
+        return int(data) if data else 0
+
+    def _bump_version(self, lock_file):
+        version = self._read_version(lock_file) + 1
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(version))
+        lock_file.flush()
+        return version
+
+    # Parses record by record when the index allows it: each step is short, so
+    # a UI thread waiting on the GIL is not held up for the whole parse.
+    def _load_main(self):
+        if not os.path.exists(self.path):
+            return {}
+        index = self._load_index()
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        return _parse_users(data, index)
+
+    def _read_journal(self, paths=None):
+        for path in self._journals() if paths is None else paths:
+            try:
+                f = open(path, 'r')
+            except FileNotFoundError:
+                continue
+            with f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # torn final line from an interrupted append
+                        continue
+                    yield entry['user'], entry['report']
+
+    # =========================
+    # Credentials index
+    # =========================
+    # Used whenever no full document is held; a held one is authoritative.
+    def _use_index(self):
+        return self._cache is None and not self._dirty
+
+    # Returns {username: [fields, offset, length]}, or None when there is no
+    # index matching the current users.json. Call with the file lock held.
+    # The file is JSON lines: [mtime_ns, size] of users.json, then one
+    # [username, fields, offset, length] per account.
+    def _load_index(self):
+        main, index = _file_stat(self.path), _file_stat(self.index_path)
+        if main is None or index is None:
+            return None
+        if (main, index) != self._index_key:
+            try:
+                with open(self.index_path, 'r') as f:
+                    if json.loads(f.readline()) != list(main):
+                        return None
+                    entries = {}
+                    for line in f:
+                        username, fields, offset, length = json.loads(line)
+                        entries[username] = [fields, offset, length]
+            except (OSError, ValueError):
+                return None
+            self._index = entries
+            self._index_key = (main, index)
+        return self._index
+
+    # The user's own reports from their slice of users.json plus the journal,
+    # or None when the index cannot be used.
+    def _indexed_reports(self, username):
+        with file_lock(self.lock_path, exclusive=False) as lock_file:
+            index = self._load_index()
+            if index is None:
+                return None
+            key = (self._read_version(lock_file), self._stat_key(), username)
+            if self._reports_cache is not None and self._reports_cache[0] == key:
+                return self._reports_cache[1]
+            entry = index.get(username)
+            if entry is None:
+                reports = []
+            else:
+                _, offset, length = entry
+                with open(self.path, 'rb') as f:
+                    f.seek(offset)
+                    reports = json.loads(f.read(length)).get('reports', [])
+                reports += [report for user, report in self._read_journal() if user == username]
+        self._reports_cache = (key, reports)
+        return reports
+
+    # Returns the live cached dict: mutate it only when saving it right after.
+    def load_users(self):
+        with self.lock:
+            # unflushed coalesced writes take precedence over the file
+            if self._cache is not None and self._dirty:
+                self.stats['hits'] += 1
+                return self._cache
+            with file_lock(self.lock_path, exclusive=False) as lock_file:
+                key = (self._read_version(lock_file), self._stat_key())
+                if self._cache is not None and key == self._cache_key:
+                    self.stats['hits'] += 1
+                    return self._cache
+                self.stats['misses' if self._cache is None else 'reloads'] += 1
+                users = self._load_main()
+                for username, report in self._read_journal():
+                    # entries for accounts deleted before compaction are dropped
+                    if username in users:
+                        users[username].setdefault('reports', []).append(report)
+            self._cache = users
+            self._cache_key = key
+            return users
+
+    # fn mutates the users dict and returns the result; a falsy result means
+    # nothing changed. commit persists the change while the write lock is held.
+    def _mutate(self, fn, commit=None):
+        commit = commit or self._commit_save
+        with self.lock:
+            for _ in range(self.max_retries):
+                users = self.load_users()
+                with file_lock(self.lock_path) as lock_file:
+                    if not self._dirty and self._read_version(lock_file) != self._cache_key[0]:
+                        self.stats['conflicts'] += 1
+                        continue
+                    result = fn(users)
+                    if result:
+                        try:
+                            commit(users, lock_file)
+                        except BaseException:
+                            self._cache = None
+                            raise
+                    # a refused change or a journal append writes no users.json,
+                    # so nothing released the document; go back to the index
+                    if not self._dirty:
+                        self._cache = None
+                    return result
+            raise StoreConflictError(f'{self.path} kept changing; gave up after {self.max_retries} attempts')
+
+    def _commit_save(self, users, lock_file):
+        self._cache = users
+        if not self.coalesce_window:
+            self._write(users, lock_file)
+            return
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.coalesce_window, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def save_users(self, users):
+        with self.lock, file_lock(self.lock_path) as lock_file:
+            self._commit_save(users, lock_file)
+
+    def flush(self):
+        with self.lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty:
+                with file_lock(self.lock_path) as lock_file:
+                    self._write(self._cache, lock_file)
+
+    def _write(self, users, lock_file):
+        try:
+            # users came from load_users(), so every journal is now folded in
+            self._install(self._prepare(users), lock_file, self._journals())
+        except BaseException:
+            self._cache = None
+            raise
+        finally:
+            self._dirty = False
+        self.journal_entries = 0
+        # keep only the index in memory; reports are read back from their slices
+        self._cache = None
+
+    # Writes users.json and its index to temp files beside them; no lock is
+    # needed until _install renames them into place.
+    def _prepare(self, users):
+        pointers = {}
+
+        def write(f):
+            position = 1
+            f.write('{')
+            for n, (username, user) in enumerate(users.items()):
+                head = (',' if n else '') + json.dumps(username) + ':'
+                body = json.dumps(user, separators=(',', ':'))
+                # ensure_ascii output, so string lengths are byte lengths
+                pointers[username] = [position + len(head), len(body)]
+                f.write(head)
+                f.write(body)
+                position += len(head) + len(body)
+            f.write('}')
+        main_tmp = write_temp(self.path, write)
+        # a rename keeps mtime and size, so this is the stat of the installed file
+        header = _file_stat(main_tmp)
+
+        entries = {}
+
+        def write_index(f):
+            f.write(json.dumps(list(header)) + '\n')
+            for username, user in users.items():
+                fields = {k: v for k, v in user.items() if k != 'reports'}
+                entries[username] = [fields, *pointers[username]]
+                f.write(json.dumps([username, *entries[username]], separators=(',', ':')) + '\n')
+        try:
+            index_tmp = write_temp(self.index_path, write_index)
+        except BaseException:
+            discard_temp(main_tmp)
+            raise
+        return main_tmp, index_tmp, entries
+
+    # folded are the journals whose entries the prepared document includes.
+    # Call with the exclusive file lock held.
+    def _install(self, prepared, lock_file, folded):
+        main_tmp, index_tmp, entries = prepared
+        try:
+            os.replace(main_tmp, self.path)
+            os.replace(index_tmp, self.index_path)
+        except BaseException:
+            discard_temp(main_tmp)
+            discard_temp(index_tmp)
+            raise
+        fsync_directory(self.path)
+        self._index = entries
+        self._index_key = (_file_stat(self.path), _file_stat(self.index_path))
+        for path in folded:
+            if os.path.exists(path):
+                os.remove(path)
+        self._cache_key = (self._bump_version(lock_file), self._stat_key())
+
+    def get_user(self, username):
+        with self.lock:
+            if self._use_index():
+                with file_lock(self.lock_path, exclusive=False):
+                    index = self._load_index()
+                    if index is not None:
+                        entry = index.get(username)
+                        return None if entry is None else dict(entry[0])
+            user = self.load_users().get(username)
+        if user is None:
+            return None
+        return {k: v for k, v in user.items() if k != 'reports'}
+
+    def create_user(self, username, password_hash):
+        def create(users):
+            if username in users:
+                return False
+            users[username] = {
+                'password': password_hash,
+                'reports': []
+            }
+            return True
+        return self._mutate(create)
+
+    def update_user(self, username, **fields):
+        def update(users):
+            if username not in users:
+                return False
+            users[username].update(fields)
+            return True
+        return self._mutate(update)
+
+    def put_user(self, username, user):
+        return self._mutate(lambda users: _put_record(users, username, user))
+
+    # The whole batch is one mutation and one write of users.json, rather than
+    # a rewrite per account.
+    def import_users(self, users):
+        def put_all(existing):
+            for username, user in users.items():
+                _put_record(existing, username, user)
+            return True
+        return self._mutate(put_all)
+
+    def delete_user(self, username):
+        def delete(users):
+            if username not in users:
+                return False
+            del users[username]
+            return True
+        return self._mutate(delete)
+
+    def append_report(self, username, report):
+        def append(users):
+            if username not in users:
+                return False
+            users[username].setdefault('reports', []).append(report)
+            return True
+        if not self.journal_path:
+            return self._mutate(append)
+        line = json.dumps({'user': username, 'report': report}, separators=(',', ':'))
+        with self.lock:
+            if self._use_index():
+                # the journal line only needs the account to exist
+                with file_lock(self.lock_path) as lock_file:
+                    index = self._load_index()
+                    if index is not None:
+                        if username not in index:
+                            return False
+                        self._append_journal(line, lock_file)
+                        return True
+        return self._mutate(append, commit=lambda users, lock_file: self._append_journal(line, lock_file))
+
+    def _append_journal(self, line, lock_file):
+        with open(self.journal_path, 'a') as f:
+            f.write(line + '\n')
+        self._cache_key = (self._bump_version(lock_file), self._stat_key())
+        self.journal_entries += 1
+        if self.journal_entries >= self.compact_after:
+            self._wake.set()
+
+    def _user_reports(self, username):
+        with self.lock:
+            reports = self._indexed_reports(username) if self._use_index() else None
+            if reports is None:
+                user = self.load_users().get(username)
+                reports = user.get('reports', []) if user else []
+        return reports
+
+    def get_reports(self, username, offset=0, limit=None):
+        reports = self._user_reports(username)
+        return reports[offset:None if limit is None else offset + limit]
+
+    def count_reports(self, username):
+        return len(self._user_reports(username))
+
+    def clear_reports(self, username):
+        def clear(users):
+            if username not in users:
+                return False
+            users[username]['reports'] = []
+            return True
+        return self._mutate(clear)
+
+    def load_all(self):
+        with self.lock:
+            users = copy.deepcopy(self.load_users())
+            if not self._dirty:
+                self._cache = None
+        return users
+
+    # Appends never wait on a fold: the live journal is renamed to
+    # users.json.journal.N and appends start a fresh one, then the rotated
+    # journals are parsed and written out without holding either lock. Only
+    # renaming the result into place takes the locks, and it is dropped if
+    # users.json was rewritten meanwhile; the rotated journals are then folded
+    # by that write or the next compaction.
+    def compact(self):
+        with self.lock:
+            if self._dirty:
+                self.flush()
+                return
+            if self._index_stale():
+                self._mutate(lambda users: True)
+                return
+        rotated = self._rotate_journal()
+        if rotated:
+            self._fold_journals(rotated)
+
+    # Returns the rotated journals waiting to be folded, oldest first.
+    def _rotate_journal(self):
+        if not self.journal_path:
+            return []
+        with self.lock, file_lock(self.lock_path) as lock_file:
+            rotated = self._journals()[:-1]
+            if os.path.exists(self.journal_path):
+                number = int(rotated[-1].rsplit('.', 1)[1]) + 1 if rotated else 1
+                rotated.append(f'{self.journal_path}.{number}')
+                os.replace(self.journal_path, rotated[-1])
+                self.journal_entries = 0
+                self._bump_version(lock_file)
+            return rotated
+
+    def _fold_journals(self, rotated):
+        with self.lock, file_lock(self.lock_path, exclusive=False):
+            base = _file_stat(self.path)
+            index = self._load_index()
+        users = {}
+        if base is not None:
+            with open(self.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if (st.st_mtime_ns, st.st_size) != base:
+                    return
+                data = f.read()
+            users = _parse_users(data, index)
+        for username, report in self._read_journal(rotated):
+            # entries for accounts deleted before compaction are dropped
+            if username in users:
+                users[username].setdefault('reports', []).append(report)
+        prepared = self._prepare(users)
+        with self.lock, file_lock(self.lock_path) as lock_file:
+            if self._dirty or _file_stat(self.path) != base or not all(map(os.path.exists, rotated)):
+                for tmp_path in prepared[:2]:
+                    discard_temp(tmp_path)
+                return
+            self._install(prepared, lock_file, rotated)
+            self._cache = None
+
+    def _index_stale(self):
+        if not os.path.exists(self.path):
+            return False
+        with file_lock(self.lock_path, exclusive=False):
+            return self._load_index() is None
+
+    def start_compactor(self, interval=30.0):
+        if self.journal_path and self._compactor is None:
+            self._stop.clear()
+            self._compactor = threading.Thread(target=self._compact_loop, args=(interval,), daemon=True)
+            self._compactor.start()
+
+    def _compact_loop(self, interval):
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            self.compact()
+
+    def close(self):
+        if self._compactor is not None:
+            self._stop.set()
+            self._wake.set()
+            self._compactor.join()
+            self._compactor = None
+        self.compact()
+
+
+# =========================
+# SQLite backend
+# =========================
+SQLITE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    fields   TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS reports (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+    body     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_by_user ON reports(username, id);
+'''
+
+
+class SqliteUserStore(UserStore):
+    def __init__(self, path='users.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    def get_user(self, username):
+        row = self.conn.execute(
+            'SELECT password, fields FROM users WHERE username = ?', (username,)
+        ).fetchone()
+        if row is None:
+            return None
+        user = json.loads(row[1])
+        user['password'] = row[0]
+        return user
+
+    def create_user(self, username, password_hash):
+        try:
+            with self.conn:
+                self.conn.execute(
+                    'INSERT INTO users (username, password) VALUES (?, ?)',
+                    (username, password_hash)
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def update_user(self, username, **fields):
+        with self.conn:
+            user = self.get_user(username)
+            if user is None:
+                return False
+            user.update(fields)
+            password = user.pop('password')
+            self.conn.execute(
+                'UPDATE users SET password = ?, fields = ? WHERE username = ?',
+                (password, json.dumps(user, separators=(',', ':')), username)
+            )
+        return True
+
+    def put_user(self, username, user):
+        with self.conn:
+            self._put(username, user)
+        return True
+
+    # Upserts one account; runs inside the caller's transaction.
+    def _put(self, username, user):
+        fields = {k: v for k, v in user.items() if k not in ('password', 'reports')}
+        self.conn.execute(
+            'INSERT INTO users (username, password, fields) VALUES (?, ?, ?) '
+            'ON CONFLICT(username) DO UPDATE SET password = excluded.password, fields = excluded.fields',
+            (username, user['password'], json.dumps(fields, separators=(',', ':')))
+        )
+        if 'reports' in user:
+            self.conn.execute('DELETE FROM reports WHERE username = ?', (username,))
+            self.conn.executemany(
+                'INSERT INTO reports (username, body) VALUES (?, ?)',
+                [(username, json.dumps(r, separators=(',', ':'))) for r in user['reports']]
+            )
+
+    def delete_user(self, username):
+        with self.conn:
+            cur = self.conn.execute('DELETE FROM users WHERE username = ?', (username,))
+        return cur.rowcount > 0
+
+    def append_report(self, username, report):
+        try:
+            with self.conn:
+                self.conn.execute(
+                    'INSERT INTO reports (username, body) VALUES (?, ?)',
+                    (username, json.dumps(report, separators=(',', ':')))
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def get_reports(self, username, offset=0, limit=None):
+        rows = self.conn.execute(
+            'SELECT body FROM reports WHERE username = ? ORDER BY id LIMIT ? OFFSET ?',
+            (username, -1 if limit is None else limit, offset)
+        )
+        return [json.loads(body) for (body,) in rows]
+
+    def count_reports(self, username):
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM reports WHERE username = ?', (username,)
+        ).fetchone()[0]
+
+    def clear_reports(self, username):
+        if self.get_user(username) is None:
+            return False
+        with self.conn:
+            self.conn.execute('DELETE FROM reports WHERE username = ?', (username,))
+        return True
+
+    def load_all(self):
+        users = {}
+        for username, password, fields in self.conn.execute(
+            'SELECT username, password, fields FROM users'
+        ):
+            user = json.loads(fields)
+            user['password'] = password
+            user['reports'] = self.get_reports(username)
+            users[username] = user
+        return users
+
+    # Same upsert as put_user, all in one transaction.
+    def import_users(self, users):
+        with self.conn:
+            for username, user in users.items():
+                self._put(username, user)
+
+    def close(self):
+        self.conn.close()
+
+
+# =========================
+# Sharded backend (one file per user)
+# =========================
+# users/<h[:2]>/<h>.json where h is the SHA-256 of the username, so an action
+# only reads and rewrites the acting user's shard. Each bucket directory has
+# its own lock file guarding read-modify-write of the shards inside it.
+class ShardedUserStore(UserStore):
+    def __init__(self, root='users'):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _shard(self, username):
+        digest = hashlib.sha256(username.encode()).hexdigest()
+        bucket = os.path.join(self.root, digest[:2])
+        return bucket, os.path.join(bucket, digest + '.json')
+
+    def _read(self, path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)['user']
+        except FileNotFoundError:
+            return None
+
+    # fn gets the current record (or None) and returns the record to write,
+    # None to leave the shard alone, or DELETE to remove it.
+    def _update(self, username, fn):
+        if not username:
+            return False
+        bucket, path = self._shard(username)
+        os.makedirs(bucket, exist_ok=True)
+        with file_lock(os.path.join(bucket, '.lock')):
+            record = fn(self._read(path))
+            if record is None:
+                return False
+            if record is DELETE:
+                os.remove(path)
+            else:
+                atomic_write_json(path, {'username': username, 'user': record})
+            return True
+
+    def get_user(self, username):
+        if not username:
+            return None
+        user = self._read(self._shard(username)[1])
+        if user is None:
+            return None
+        return {k: v for k, v in user.items() if k != 'reports'}
+
+    def create_user(self, username, password_hash):
+        return self._update(username, lambda user: None if user is not None else {
+            'password': password_hash,
+            'reports': []
+        })
+
+    def update_user(self, username, **fields):
+        return self._update(username, lambda user: None if user is None else {**user, **fields})
+
+    def put_user(self, username, user):
+        def put(existing):
+            record = copy.deepcopy(user)
+            if 'reports' not in record:
+                record['reports'] = existing.get('reports', []) if existing else []
+            return record
+        return self._update(username, put)
+
+    def delete_user(self, username):
+        return self._update(username, lambda user: None if user is None else DELETE)
+
+    def append_report(self, username, report):
+        def append(user):
+            if user is None:
+                return None
+            user.setdefault('reports', []).append(report)
+            return user
+        return self._update(username, append)
+
+    def get_reports(self, username, offset=0, limit=None):
+        if not username:
+            return []
+        user = self._read(self._shard(username)[1])
+        reports = user.get('reports', []) if user else []
+        return reports[offset:None if limit is None else offset + limit]
+
+    def clear_reports(self, username):
+        return self._update(username, lambda user: None if user is None else {**user, 'reports': []})
+
+    def load_all(self):
+        users = {}
+        for bucket in sorted(os.listdir(self.root)):
+            bucket_path = os.path.join(self.root, bucket)
+            if not os.path.isdir(bucket_path):
+                continue
+            for name in sorted(os.listdir(bucket_path)):
+                if name.endswith('.json'):
+                    with open(os.path.join(bucket_path, name), 'r') as f:
+                        shard = json.load(f)
+                    users[shard['username']] = shard['user']
+        return users
+
+
+DELETE = object()
+
+
+# =========================
+# Factory
+# =========================
+BACKENDS = {
+    'json': JsonUserStore,
+    'sqlite': SqliteUserStore,
+    'sharded': ShardedUserStore,
+}
+
+
+def open_store(backend='json', path=None, **options):
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown storage backend: {backend!r}')
+    if path is None:
+        return BACKENDS[backend](**options)
+    return BACKENDS[backend](path, **options)
+
+
+# RISKAPP_STORE picks the backend ('json', 'sqlite' or 'sharded') and
+# RISKAPP_STORE_PATH its location. Every app entry point opens its store
+# through here so they all see the same accounts.
+STORE_PATHS = {'json': 'users.json', 'sqlite': 'users.db', 'sharded': 'users'}
+
+
+def open_configured_store(environ=None, **options):
+    environ = os.environ if environ is None else environ
+    backend = environ.get('RISKAPP_STORE', 'json')
+    if backend == 'json' and environ.get('RISKAPP_STORE_COALESCE'):
+        # seconds to hold JSON mutations before flushing them as one write
+        options.setdefault('coalesce_window', float(environ['RISKAPP_STORE_COALESCE']))
+    return open_store(backend, environ.get('RISKAPP_STORE_PATH', STORE_PATHS.get(backend)), **options)
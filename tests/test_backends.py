@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from storage import STORE_PATHS, open_store
+
+# The UserStore contract every backend keeps; the JSON store has its own
+# tests in test_storage.py.
+BACKENDS = ['sqlite', 'sharded']
+
+
+@pytest.fixture(params=BACKENDS)
+def store(request, tmp_path):
+    store = open_store(request.param, str(tmp_path / STORE_PATHS[request.param]))
+    yield store
+    store.close()
+
+
+def test_accounts(store):
+    assert store.create_user('ann', 'hash')
+    assert not store.create_user('ann', 'other hash')
+    assert store.get_user('ann') == {'password': 'hash'}
+    assert store.get_user('nobody') is None
+
+    assert store.update_user('ann', email='ann@example.com')
+    assert not store.update_user('nobody', email='x')
+    assert store.get_user('ann') == {'password': 'hash', 'email': 'ann@example.com'}
+
+    assert store.delete_user('ann')
+    assert not store.delete_user('ann')
+    assert store.get_user('ann') is None
+
+
+def test_reports_are_paged_oldest_first(store):
+    store.create_user('ann', 'hash')
+    for n in range(7):
+        assert store.append_report('ann', {'n': n})
+    assert not store.append_report('nobody', {'n': 0})
+    assert store.count_reports('ann') == 7
+    assert store.get_reports('ann', 2, 3) == [{'n': 2}, {'n': 3}, {'n': 4}]
+    assert store.get_reports('ann', 5) == [{'n': 5}, {'n': 6}]
+
+    assert store.clear_reports('ann')
+    assert store.count_reports('ann') == 0
+    assert not store.clear_reports('nobody')
+
+
+def test_deleting_an_account_drops_its_reports(store):
+    store.create_user('ann', 'hash')
+    store.append_report('ann', {'n': 0})
+    store.delete_user('ann')
+    store.create_user('ann', 'new hash')
+    assert store.get_reports('ann') == []
+
+
+def test_put_user_keeps_reports_unless_given(store):
+    store.create_user('ann', 'hash')
+    store.append_report('ann', {'n': 0})
+    assert store.put_user('ann', {'password': 'new hash', 'email': 'ann@example.com'})
+    assert store.get_reports('ann') == [{'n': 0}]
+    store.put_user('ann', {'password': 'new hash', 'reports': [{'n': 1}]})
+    assert store.load_all() == {'ann': {'password': 'new hash', 'reports': [{'n': 1}]}}
+
+
+def test_sharded_accounts_live_in_their_own_files(tmp_path):
+    store = open_store('sharded', str(tmp_path / 'users'))
+    store.create_user('ann', 'hash')
+    store.create_user('bob', 'hash')
+    store.append_report('ann', {'n': 0})
+    ann, bob = store._shard('ann')[1], store._shard('bob')[1]
+    assert ann != bob
+    shards = sorted(p.name for p in (tmp_path / 'users').glob('*/*.json'))
+    assert shards == sorted([os.path.basename(ann), os.path.basename(bob)])
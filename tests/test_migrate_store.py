@@ -0,0 +1,56 @@
+import pytest
+
+from migrate_store import migrate
+from storage import STORE_PATHS, JsonUserStore, open_store
+
+USERS = {
+    f'user{i}': {'password': f'hash{i}', 'email': f'user{i}@example.com',
+                 'reports': [{'total': n, 'risk_level': 0} for n in range(i % 4)]}
+    for i in range(30)
+}
+
+
+def open_backend(tmp_path, backend):
+    return open_store(backend, str(tmp_path / STORE_PATHS[backend]))
+
+
+@pytest.fixture
+def source(tmp_path):
+    store = JsonUserStore(str(tmp_path / 'source.json'))
+    store.import_users(USERS)
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite', 'sharded'])
+def test_migrate_copies_every_account_and_report(tmp_path, source, backend):
+    target = open_backend(tmp_path, backend)
+    try:
+        assert migrate(source, target) == (30, sum(i % 4 for i in range(30)))
+        assert target.load_all() == USERS
+        assert target.get_reports('user7', 1, 1) == [{'total': 1, 'risk_level': 0}]
+    finally:
+        target.close()
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite', 'sharded'])
+def test_import_replaces_existing_accounts(tmp_path, source, backend):
+    target = open_backend(tmp_path, backend)
+    try:
+        target.create_user('user1', 'old hash')
+        target.append_report('user1', 'old report')
+        migrate(source, target)
+        assert target.get_user('user1')['password'] == 'hash1'
+        assert target.get_reports('user1') == USERS['user1']['reports']
+    finally:
+        target.close()
+
+
+def test_json_import_writes_once(tmp_path, monkeypatch):
+    store = JsonUserStore(str(tmp_path / 'users.json'))
+    writes = []
+    write = store._write
+    monkeypatch.setattr(store, '_write', lambda users, lock_file: writes.append(1) or write(users, lock_file))
+    store.import_users(USERS)
+    assert len(writes) == 1
+    assert store.load_all() == USERS
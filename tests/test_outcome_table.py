@@ -0,0 +1,64 @@
+import json
+import random
+
+import pytest
+
+import outcome_table
+import scoring
+from outcome_table import RADICES, SIZE, OutcomeTable, decode, encode
+from sample_forms import named, random_forms
+from score_cli import main
+
+
+@pytest.fixture(scope='module')
+def table_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('table') / 'outcomes.bin')
+    OutcomeTable(path).load().close()
+    return path
+
+
+def test_codes_round_trip():
+    assert encode([0] * len(RADICES)) == 0
+    assert encode([radix - 1 for radix in RADICES]) == SIZE - 1
+    for code in random.Random(1).sample(range(SIZE), 200):
+        assert encode(decode(code)) == code
+    with pytest.raises(ValueError):
+        decode(SIZE)
+
+
+def test_mapped_table_scores_like_scoring(table_path):
+    table = OutcomeTable(table_path).load()
+    try:
+        assert table._mmap is not None
+        for indices in random_forms(500, complete=True) + random_forms(100):
+            assert table.score(indices) == scoring.score(indices)
+    finally:
+        table.close()
+
+
+def test_damaged_file_is_rebuilt(tmp_path):
+    path = tmp_path / 'outcomes.bin'
+    path.write_bytes(b'RLUT' + bytes(10))
+    table = OutcomeTable(str(path)).load()
+    assert table.lookup(0) == scoring.score(decode(0))[1:]
+    assert path.stat().st_size == outcome_table.HEADER.size + SIZE * 9
+    table.close()
+
+
+def test_codes_reaching_a_level(table_path):
+    table = OutcomeTable(table_path)
+    level = scoring.RISK_LEVEL_NAMES[-1]
+    codes = table.codes_reaching(level)
+    assert codes and len(codes) == len(table.codes_at_level(level))
+    assert all(table.lookup(code)[1] == level for code in codes[:50])
+    table.close()
+
+
+@pytest.mark.parametrize('workers', ['1', '2'])
+def test_score_cli_uses_the_table(tmp_path, capsys, table_path, workers):
+    forms = random_forms(50, complete=True) + random_forms(10)
+    path = tmp_path / 'forms.jsonl'
+    path.write_text(''.join(json.dumps(named(form)) + '\n' for form in forms))
+    main([str(path), '--outcome-table', table_path, '--workers', workers, '--chunk-size', '8'])
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(r['total'], r['risk_level']) for r in results] == [tuple(scoring.score(f)[1:]) for f in forms]
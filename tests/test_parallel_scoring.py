@@ -0,0 +1,29 @@
+import pytest
+
+import scoring
+from parallel_scoring import RADICES, ordered_map, pack, score_parallel, unpack
+from sample_forms import random_forms
+
+
+def test_pack_round_trips_every_digit():
+    rows = random_forms(500, seed=3) + [[-1] * len(RADICES), [radix - 2 for radix in RADICES]]
+    for row in rows:
+        assert unpack(pack(row)) == row
+
+
+def test_pack_rejects_out_of_range_indices():
+    row = [-1] * len(RADICES)
+    row[0] = RADICES[0] - 1
+    with pytest.raises(ValueError):
+        pack(row)
+
+
+def test_results_come_back_in_input_order():
+    rows = random_forms(1000, seed=3)
+    expected = [scoring.score(row)[1:] for row in rows]
+    # small chunks so several are in flight at once
+    assert score_parallel(rows, workers=2, chunk_size=37) == expected
+
+
+def test_ordered_map_keeps_payload_order():
+    assert list(ordered_map(abs, range(-50, 0), workers=2)) == list(range(50, 0, -1))
@@ -0,0 +1,50 @@
+import hashlib
+
+import pytest
+
+import passwords
+
+
+@pytest.fixture(autouse=True)
+def cheap_policy():
+    scheme, cost = passwords.current_scheme, passwords.current_cost
+    passwords.configure('pbkdf2_sha256', 1000)
+    yield
+    passwords.configure(scheme, cost)
+
+
+def test_hash_round_trip():
+    stored = passwords.hash_password('secret')
+    assert stored.startswith('pbkdf2_sha256$1000$')
+    assert passwords.verify_password('secret', stored) == (True, False)
+    assert passwords.verify_password('wrong', stored) == (False, False)
+    assert passwords.hash_password('secret') != stored
+
+
+def test_legacy_sha256_is_replaced_after_a_match():
+    legacy = hashlib.sha256(b'secret').hexdigest()
+    assert passwords.is_legacy(legacy)
+    assert passwords.verify_and_upgrade('wrong', legacy) == (False, None)
+
+    matches, upgraded = passwords.verify_and_upgrade('secret', legacy)
+    assert matches and not passwords.is_legacy(upgraded)
+    assert passwords.verify_password('secret', upgraded) == (True, False)
+
+
+def test_hash_under_an_older_policy_still_verifies_and_is_upgraded():
+    old = passwords.hash_password('secret', 'pbkdf2_sha256', 500)
+    assert passwords.verify_password('secret', old) == (True, True)
+    matches, upgraded = passwords.verify_and_upgrade('secret', old)
+    assert matches and upgraded.startswith('pbkdf2_sha256$1000$')
+
+
+def test_dummy_hash_matches_nothing_at_the_current_cost():
+    dummy = passwords.dummy_hash()
+    assert dummy.split('$')[:2] == ['pbkdf2_sha256', '1000']
+    assert passwords.verify_and_upgrade('', dummy) == (False, None)
+    assert passwords.verify_and_upgrade('secret', dummy) == (False, None)
+
+
+@pytest.mark.parametrize('stored', ['', 'garbage', 'pbkdf2_sha256$x$y$z', 'md5$1$AA==$AA=='])
+def test_malformed_hashes_do_not_match(stored):
+    assert passwords.verify_password('secret', stored) == (False, False)
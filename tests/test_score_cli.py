@@ -0,0 +1,75 @@
+import csv
+import json
+
+import pytest
+
+import scoring
+from score_cli import main
+
+CATEGORIES = scoring.CATEGORY_NAMES
+
+
+def write_jsonl(path, records):
+    path.write_text(''.join((r if isinstance(r, str) else json.dumps(r)) + '\n' for r in records))
+    return str(path)
+
+
+def run(capsys, *argv):
+    main([*argv])
+    return capsys.readouterr()
+
+
+def forms(count):
+    return [{'id': n, **{c: n % len(scoring.CATEGORY_LABELS[c]) for c in CATEGORIES}} for n in range(count)]
+
+
+@pytest.mark.parametrize('workers', ['1', '2'])
+def test_results_keep_input_order(tmp_path, capsys, workers):
+    records = forms(250)
+    path = write_jsonl(tmp_path / 'forms.jsonl', records)
+    out = run(capsys, path, '--workers', workers, '--chunk-size', '7').out
+    results = [json.loads(line) for line in out.splitlines()]
+    assert [r['id'] for r in results] == list(range(250))
+    for record, result in zip(records, results):
+        _, total, level = scoring.score([record[c] for c in CATEGORIES])
+        assert (result['total'], result['risk_level']) == (total, level)
+
+
+@pytest.mark.parametrize('workers', ['1', '2'])
+def test_bad_record_stops_the_run_with_its_line_number(tmp_path, capsys, workers):
+    records = forms(20)
+    records[12] = '{"id": 12, "broken'
+    path = write_jsonl(tmp_path / 'forms.jsonl', records)
+    with pytest.raises(SystemExit) as exit_info:
+        run(capsys, path, '--workers', workers, '--chunk-size', '5')
+    assert 'line 13:' in str(exit_info.value)
+    assert len(capsys.readouterr().out.splitlines()) == 12
+
+
+@pytest.mark.parametrize('workers', ['1', '2'])
+def test_skipped_records_are_reported_with_their_line_numbers(tmp_path, capsys, workers):
+    records = forms(20)
+    records[3] = {'id': 3, CATEGORIES[0]: 99}
+    records[17] = '[1, 2]'
+    path = write_jsonl(tmp_path / 'forms.jsonl', records)
+    captured = run(capsys, path, '--on-error', 'skip', '--workers', workers, '--chunk-size', '4')
+    assert [json.loads(line)['id'] for line in captured.out.splitlines()] == [n for n in range(20) if n not in (3, 17)]
+    assert [line.split(':')[0] for line in captured.err.splitlines()] == ['skipped line 4', 'skipped line 18']
+
+
+@pytest.mark.parametrize('workers', ['1', '2'])
+def test_csv_line_numbers_count_quoted_line_breaks(tmp_path, capsys, workers):
+    path = tmp_path / 'forms.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'note', CATEGORIES[0]])
+        writer.writerow(['a', 'one\nline break', '0'])
+        writer.writerow(['b', '', '0'])
+        writer.writerow(['c', 'two\nline\nbreaks', '0'])
+        writer.writerow(['d', '', '-5'])
+    with pytest.raises(SystemExit) as exit_info:
+        run(capsys, str(path), '--workers', workers, '--chunk-size', '2')
+    assert 'line 8:' in str(exit_info.value)
+    rows = list(csv.reader(capsys.readouterr().out.splitlines()))
+    assert rows[0] == ['id', 'total', 'risk_level']
+    assert [row[0] for row in rows[1:]] == ['a', 'b', 'c']
@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+import pytest
+
+from score_server import ScoringServer
+
+
+# Sends raw request bytes to a server on an ephemeral port; returns the status
+# code and JSON body of the response.
+def exchange(request):
+    async def run():
+        server = ScoringServer()
+        listener = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(request)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        return int(head.split()[1]), json.loads(body)
+    return asyncio.run(run())
+
+
+def post(path, body):
+    return f'POST {path} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body
+
+
+def test_score():
+    status, payload = exchange(post('/score', b'{"selections": {}}'))
+    assert status == 200
+    assert payload == {'total': 0.0, 'risk_level': 'Low Risk', 'stored': False}
+
+
+@pytest.mark.parametrize('length', [b'-1', b'-100', b'ten'])
+def test_bad_content_length_is_rejected(length):
+    request = b'POST /score HTTP/1.1\r\nContent-Length: ' + length + b'\r\n\r\n{}'
+    assert exchange(request) == (400, {'error': 'malformed request'})
+
+
+def test_oversized_body_is_rejected():
+    request = b'POST /score HTTP/1.1\r\nContent-Length: 999999999\r\n\r\n'
+    assert exchange(request)[0] == 413
@@ -0,0 +1,107 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+import batch_scoring
+import questionnaire
+import scoring
+from reports import Report
+from sample_forms import labelled, random_indices
+
+
+# The app's original calculate_fake_risk, before scoring moved into tables:
+# points are parsed out of the option labels and unselected categories
+# score 0.
+def original_score(selections):
+    def score_from_text(value):
+        if ':' in value:
+            try:
+                return int(value.split(':')[1].strip().split()[0])
+            except ValueError:
+                return 0
+        return 0
+
+    age_score = score_from_text(selections.get('Age', '0: 0'))
+    family_history_score = score_from_text(selections.get('Family History of Diabetes', '0: 0'))
+    bp_score = score_from_text(selections.get('Blood Pressure Levels', '0: 0'))
+    blood_sugar_score = score_from_text(selections.get('Blood Sugar Levels (Optional)', '0: 0'))
+    activity_score = score_from_text(selections.get('Physical Activity Levels', '0: 0'))
+    calorie_score = score_from_text(selections.get('Estimated Daily Calorie Intake', '0: 0'))
+    diet_score = score_from_text(selections.get('Diet Quality/Habits', '0: 0'))
+    stress_score = score_from_text(selections.get('Stress Levels', '0: 0'))
+
+    risk1 = age_score * family_history_score
+    risk2 = bp_score * blood_sugar_score
+    risk3 = stress_score * diet_score
+    risk4 = calorie_score * (10 - activity_score)
+
+    total = (
+        age_score + family_history_score + bp_score + blood_sugar_score +
+        activity_score + calorie_score + diet_score + stress_score +
+        0.5 * risk1 + 0.6 * risk2 + 0.4 * risk3 + 0.7 * risk4
+    )
+    total = round(total, 2)
+    if total <= 45:
+        return total, 'Low Risk'
+    if total <= 85:
+        return total, 'Moderate Risk'
+    return total, 'High Risk'
+
+
+def all_selections():
+    ranges = [range(scoring.UNSELECTED, len(scoring.CATEGORY_LABELS[name])) for name in scoring.CATEGORY_NAMES]
+    return itertools.product(*ranges)
+
+
+def test_score_matches_original_formula_for_every_selection():
+    count = 0
+    for indices in all_selections():
+        _, total, level = scoring.score(indices)
+        assert (total, level) == original_score(labelled(indices)), indices
+        count += 1
+    assert count == 562_500
+
+
+def test_batch_scoring_matches_score_for_every_selection():
+    rows = np.array(list(all_selections()), dtype=np.intp)
+    totals, levels = batch_scoring.score_batch(rows)
+    names = batch_scoring.level_names(levels)
+    for indices, total, level in zip(rows.tolist(), totals.tolist(), names):
+        assert (total, level) == scoring.score(indices)[1:], indices
+
+
+def test_running_score_matches_score():
+    rng = random.Random(0)
+    for _ in range(2000):
+        running = scoring.RunningScore()
+        indices = [scoring.UNSELECTED] * len(scoring.CATEGORY_NAMES)
+        for _ in range(rng.randrange(1, 20)):
+            category = rng.randrange(len(scoring.CATEGORY_NAMES))
+            index = rng.randrange(scoring.UNSELECTED, len(scoring.CATEGORY_LABELS[scoring.CATEGORY_NAMES[category]]))
+            changed = running.select(category, index)
+            assert changed == (indices[category] != index)
+            indices[category] = index
+            assert running.result() == scoring.score(indices)[1:], indices
+
+
+def test_risk_level_names_come_from_the_schema():
+    assert scoring.RISK_LEVEL_NAMES == ('Low Risk', 'Moderate Risk', 'High Risk')
+    assert scoring.RISK_LEVEL_NAMES == questionnaire.load_schema(scoring.SCHEMA_VERSION).risk_level_names
+
+
+def test_report_records_round_trip():
+    rng = random.Random(1)
+    for _ in range(200):
+        indices = random_indices(rng)
+        report = Report.create(indices, *scoring.score(indices), scoring.SCHEMA_VERSION, timestamp=1)
+        assert Report.decode(report.encode()) == report
+        assert report.rescore() == scoring.score(indices)
+
+
+def test_format_1_records_decode_with_schema_1_levels():
+    report = Report.decode([1, 5, [0], [1], 90.0, 2])
+    assert (report.timestamp, report.total, report.risk_level, report.schema_version) == (5, 90.0, 'High Risk', 1)
+    with pytest.raises(ValueError):
+        Report.decode([9, 0])
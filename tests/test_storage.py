@@ -0,0 +1,240 @@
+import json
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from storage import JsonUserStore, StoreConflictError
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'users.json')
+
+
+def seed(path, users=20, reports=3):
+    JsonUserStore(path).save_users({
+        f'user{i}': {'password': f'hash{i}', 'reports': [f'report {i}.{n}' for n in range(reports)]}
+        for i in range(users)
+    })
+
+
+# =========================
+# Journal
+# =========================
+def test_reports_are_journaled_then_compacted(path):
+    seed(path)
+    store = JsonUserStore(path)
+    assert store.append_report('user1', 'new report')
+    assert not store.append_report('nobody', 'lost report')
+    assert os.path.exists(store.journal_path)
+    assert store.get_reports('user1')[-1] == 'new report'
+    assert store.count_reports('user1') == 4
+
+    store.compact()
+    assert not os.path.exists(store.journal_path)
+    with open(path) as f:
+        assert json.load(f)['user1']['reports'][-1] == 'new report'
+    assert JsonUserStore(path).get_reports('user1', 2, 2) == ['report 1.2', 'new report']
+
+
+def test_torn_journal_line_is_ignored(path):
+    seed(path)
+    store = JsonUserStore(path)
+    store.append_report('user2', 'kept')
+    with open(store.journal_path, 'a') as f:
+        f.write('{"user":"user2","rep')
+    assert JsonUserStore(path).get_reports('user2')[-1] == 'kept'
+
+
+def test_reports_of_deleted_accounts_are_dropped(path):
+    seed(path)
+    store = JsonUserStore(path)
+    store.append_report('user3', 'orphan')
+    other = JsonUserStore(path)
+    assert other.delete_user('user3')
+    other.compact()
+    assert 'user3' not in other.load_all()
+
+
+# Runs during(store) from inside compact(), after the journal is rotated and
+# while the new users.json is being prepared.
+def during_fold(store, during):
+    prepare = store._prepare
+
+    def prepare_and_interleave(users):
+        during()
+        return prepare(users)
+    store._prepare = prepare_and_interleave
+
+
+def test_appends_go_to_a_fresh_journal_during_compaction(path):
+    seed(path)
+    store = JsonUserStore(path)
+    store.append_report('user1', 'folded')
+
+    def append_from_another_thread():
+        other = JsonUserStore(path)
+        thread = threading.Thread(target=other.append_report, args=('user1', 'appended'))
+        thread.start()
+        thread.join(5)
+        assert not thread.is_alive()
+    during_fold(store, append_from_another_thread)
+    store.compact()
+
+    assert not os.path.exists(store.journal_path + '.1')
+    assert list(store._read_journal()) == [('user1', 'appended')]
+    with open(path) as f:
+        assert json.load(f)['user1']['reports'][-1] == 'folded'
+    assert JsonUserStore(path).get_reports('user1')[-2:] == ['folded', 'appended']
+
+
+def test_fold_is_dropped_when_users_json_is_rewritten(path):
+    seed(path)
+    store = JsonUserStore(path)
+    store.append_report('user2', 'pending')
+    during_fold(store, lambda: JsonUserStore(path).update_user('user2', email='b@example.com'))
+    store.compact()
+
+    # the other write folded the rotated journal itself
+    assert store._journals() == [store.journal_path]
+    fresh = JsonUserStore(path)
+    assert fresh.get_user('user2') == {'password': 'hash2', 'email': 'b@example.com'}
+    assert fresh.get_reports('user2')[-1] == 'pending'
+
+
+# =========================
+# Credentials index
+# =========================
+def test_logins_read_only_the_index(path):
+    seed(path)
+    store = JsonUserStore(path)
+    assert store.get_user('user4') == {'password': 'hash4'}
+    assert store.get_user('nobody') is None
+    assert store.get_reports('user4') == ['report 4.0', 'report 4.1', 'report 4.2']
+    assert store._cache is None
+
+
+def test_full_document_is_released_after_a_write(path):
+    seed(path)
+    store = JsonUserStore(path)
+    assert store.update_user('user5', email='a@example.com')
+    assert store.append_report('user5', 'extra')
+    store.compact()
+    assert store._cache is None
+    assert store.get_user('user5') == {'password': 'hash5', 'email': 'a@example.com'}
+    assert store.get_reports('user5')[-1] == 'extra'
+    assert store._cache is None
+
+
+def test_full_document_is_released_after_a_refused_change(path):
+    seed(path)
+    store = JsonUserStore(path)
+    assert not store.create_user('user1', 'hash')
+    assert not store.update_user('nobody', email='x')
+    assert not store.delete_user('nobody')
+    assert store._cache is None
+
+    coalescing = JsonUserStore(path, coalesce_window=60)
+    assert coalescing.update_user('user1', email='a@example.com')
+    assert not coalescing.update_user('nobody', email='x')
+    # unflushed changes live only in the held document
+    assert coalescing._cache is not None
+    coalescing.flush()
+    assert coalescing._cache is None
+
+
+def test_stale_index_falls_back_and_is_rebuilt(path):
+    seed(path)
+    # an older version of the app rewrites users.json without the index
+    with open(path) as f:
+        users = json.load(f)
+    users['user6']['password'] = 'changed'
+    with open(path, 'w') as f:
+        json.dump(users, f, indent=2)
+
+    store = JsonUserStore(path)
+    assert store.get_user('user6') == {'password': 'changed'}
+    assert store._index_stale()
+    store.compact()
+    assert not store._index_stale()
+    fresh = JsonUserStore(path)
+    assert fresh.get_user('user6') == {'password': 'changed'}
+    assert fresh._cache is None
+
+
+# =========================
+# Multi-instance conflicts
+# =========================
+# Makes another instance write while `store` is between reading its copy and
+# taking the write lock, `times` times.
+def interleave_writes(store, other, times):
+    load_users = store.load_users
+    writes = iter(range(times))
+
+    def racing_load_users():
+        users = load_users()
+        if next(writes, None) is not None:
+            assert other.update_user('user0', email=f'{other.stats["conflicts"]}@example.com')
+        return users
+    store.load_users = racing_load_users
+
+
+def test_conflicting_write_is_retried_on_fresh_data(path):
+    seed(path)
+    store, other = JsonUserStore(path, journal=False), JsonUserStore(path, journal=False)
+    interleave_writes(store, other, 1)
+    assert store.update_user('user1', email='mine@example.com')
+    assert store.stats['conflicts'] == 1
+
+    users = JsonUserStore(path).load_all()
+    assert users['user1']['email'] == 'mine@example.com'
+    assert users['user0']['email'] == '0@example.com'
+
+
+def test_store_gives_up_when_the_file_keeps_changing(path):
+    seed(path)
+    store = JsonUserStore(path, journal=False, max_retries=3)
+    interleave_writes(store, JsonUserStore(path, journal=False), 10)
+    with pytest.raises(StoreConflictError):
+        store.update_user('user1', email='mine@example.com')
+    assert store.stats['conflicts'] == 3
+
+
+def add_accounts(path, prefix, count):
+    store = JsonUserStore(path)
+    for n in range(count):
+        assert store.create_user(f'{prefix}{n}', 'hash')
+        assert store.append_report(f'{prefix}{n}', 'report')
+        assert store.append_report('user0', f'{prefix}{n}')
+
+
+def test_processes_sharing_a_file_lose_no_writes(path):
+    seed(path)
+    processes = [multiprocessing.Process(target=add_accounts, args=(path, prefix, 25)) for prefix in 'ab']
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    users = JsonUserStore(path).load_all()
+    assert all(users[f'{prefix}{n}']['reports'] == ['report'] for prefix in 'ab' for n in range(25))
+    assert sorted(users['user0']['reports'][3:]) == sorted(f'{prefix}{n}' for prefix in 'ab' for n in range(25))
+
+
+# =========================
+# Store selection
+# =========================
+def test_configured_store_follows_the_environment(tmp_path):
+    from storage import SqliteUserStore, open_configured_store
+
+    store = open_configured_store({'RISKAPP_STORE': 'json', 'RISKAPP_STORE_PATH': str(tmp_path / 'a.json'),
+                                   'RISKAPP_STORE_COALESCE': '0.5'})
+    assert isinstance(store, JsonUserStore)
+    assert (store.path, store.coalesce_window) == (str(tmp_path / 'a.json'), 0.5)
+    store.close()
+    store = open_configured_store({'RISKAPP_STORE': 'sqlite', 'RISKAPP_STORE_PATH': str(tmp_path / 'a.db')})
+    assert isinstance(store, SqliteUserStore)
+    store.close()